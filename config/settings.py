@@ -0,0 +1,61 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Pipeline mode: 'etl' transforms in pandas, 'elt' transforms inside the database
+PIPELINE_MODE = os.getenv('PIPELINE_MODE', 'etl')
+
+# Dashboard query configuration
+PANEL_QUERY_WORKERS = int(os.getenv('PANEL_QUERY_WORKERS', 8))
+PANEL_QUERY_TIMEOUT = float(os.getenv('PANEL_QUERY_TIMEOUT', 15))
+
+# Dashboard telemetry: rolling JSON-lines log of query and chart timings, and the opt-in sidebar panel
+TELEMETRY_LOG_PATH = os.getenv('TELEMETRY_LOG_PATH', 'logs/dashboard_telemetry.jsonl')
+TELEMETRY_LOG_MAX_MB = int(os.getenv('TELEMETRY_LOG_MAX_MB', 10))
+TELEMETRY_LOG_BACKUPS = int(os.getenv('TELEMETRY_LOG_BACKUPS', 5))
+TELEMETRY_WINDOW = int(os.getenv('TELEMETRY_WINDOW', 5000))
+DASHBOARD_DEBUG = os.getenv('DASHBOARD_DEBUG', '0') == '1'
+
+# KPI service: read-only HTTP endpoint over the analytics tables
+KPI_SERVICE_HOST = os.getenv('KPI_SERVICE_HOST', '127.0.0.1')
+KPI_SERVICE_PORT = int(os.getenv('KPI_SERVICE_PORT', 8502))
+KPI_VERSION_TTL = float(os.getenv('KPI_VERSION_TTL', 30))
+KPI_CACHE_ENTRIES = int(os.getenv('KPI_CACHE_ENTRIES', 256))
+
+# API ingestion configuration
+API_CONCURRENCY = int(os.getenv('API_CONCURRENCY', 8))
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', 20))  # requests per second, 0 disables
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', 3))
+API_BACKOFF_SECONDS = float(os.getenv('API_BACKOFF_SECONDS', 0.5))
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 30))
+API_CHUNK_SIZE = int(os.getenv('API_CHUNK_SIZE', 5000))
+
+# Persistent natural-key index used for cross-run deduplication
+KEY_INDEX_PATH = os.getenv('KEY_INDEX_PATH', 'data/key_index')
+
+# Incremental batches: <INCREMENTAL_PATH>/<batch>/<table>.csv, applied in name order and read in row chunks
+INCREMENTAL_PATH = os.getenv('INCREMENTAL_PATH', 'data/incremental')
+INCREMENTAL_CHUNK_ROWS = int(os.getenv('INCREMENTAL_CHUNK_ROWS', 10000))
+
+# Out-of-core aggregation configuration
+AGG_MEMORY_BUDGET_MB = float(os.getenv('AGG_MEMORY_BUDGET_MB', 512))
+AGG_SPILL_PARTITIONS = int(os.getenv('AGG_SPILL_PARTITIONS', 16))
+AGG_SPILL_PATH = os.getenv('AGG_SPILL_PATH', 'data/spill')
+
+# Key-sharded multi-process execution (1 worker disables it)
+PARALLEL_WORKERS = int(os.getenv('PARALLEL_WORKERS', 1))
+PARALLEL_MIN_ROWS = int(os.getenv('PARALLEL_MIN_ROWS', 100000))
+
+# Warehouse backend: 'postgres' (DATABASE_URL), or embedded 'duckdb' / 'sqlite' at WAREHOUSE_PATH
+WAREHOUSE_BACKEND = os.getenv('WAREHOUSE_BACKEND', 'postgres')
+WAREHOUSE_PATH = os.getenv('WAREHOUSE_PATH', 'data/warehouse.db')
+
+# Warehouse loading: concurrent table loads, and row chunks loaded in parallel within large tables
+LOAD_WORKERS = int(os.getenv('LOAD_WORKERS', 4))
+LOAD_CHUNK_ROWS = int(os.getenv('LOAD_CHUNK_ROWS', 50000))
+
+# Pipeline stage checkpoints
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'data/checkpoints')
+CHECKPOINT_MAX_MB = float(os.getenv('CHECKPOINT_MAX_MB', 2048))
+CHECKPOINT_MAX_AGE_DAYS = float(os.getenv('CHECKPOINT_MAX_AGE_DAYS', 7))
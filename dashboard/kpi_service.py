@@ -0,0 +1,275 @@
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+from sqlalchemy import text
+from config.database import db_manager
+from config.settings import KPI_SERVICE_HOST, KPI_SERVICE_PORT, KPI_VERSION_TTL, KPI_CACHE_ENTRIES
+from dashboard.kpis import previous_period, overview_kpis
+
+logger = logging.getLogger('dashboard.kpi_service')
+
+SALES_SUMMARY_QUERY = """
+    SELECT * FROM sales_summary
+    WHERE summary_date BETWEEN :start_date AND :end_date
+    ORDER BY summary_date DESC
+"""
+
+TOP_PRODUCTS_QUERY = """
+    SELECT p.product_id, p.product_name, p.category, pm.total_quantity_sold, pm.total_revenue, pm.unique_orders
+    FROM product_metrics pm
+    JOIN products p ON pm.product_id = p.product_id
+    ORDER BY pm.total_revenue DESC
+    LIMIT :limit
+"""
+
+CATEGORIES_QUERY = """
+    SELECT p.category, p.subcategory,
+           SUM(pm.total_revenue) AS total_revenue,
+           SUM(pm.total_quantity_sold) AS total_quantity_sold
+    FROM product_metrics pm
+    JOIN products p ON pm.product_id = p.product_id
+    GROUP BY p.category, p.subcategory
+    ORDER BY total_revenue DESC
+"""
+
+MONTHLY_QUERY = "SELECT * FROM monthly_summary ORDER BY order_month DESC LIMIT :limit"
+
+# Each changes whenever a pipeline run or a reload rewrites the analytics tables
+VERSION_QUERIES = [
+    "SELECT MAX(run_id) FROM pipeline_runs WHERE status = 'success'",
+    "SELECT COUNT(*), MAX(created_at) FROM sales_summary",
+]
+
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+class BadRequest(ValueError):
+    pass
+
+def _date_param(params, name, default):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a YYYY-MM-DD date")
+
+def _limit_param(params, default, maximum=100):
+    try:
+        limit = int(params.get('limit', default))
+    except ValueError:
+        raise BadRequest("'limit' must be an integer")
+    if not 1 <= limit <= maximum:
+        raise BadRequest(f"'limit' must be between 1 and {maximum}")
+    return limit
+
+class KPIService:
+    """Serves dashboard KPIs from the analytics tables through a version-keyed cache.
+
+    Results are cached per endpoint and parameters until the data version
+    changes. The version comes from the latest successful pipeline run and
+    the sales_summary load, and is re-read at most every KPI_VERSION_TTL
+    seconds. Concurrent misses for the same key share a single database
+    round trip.
+    """
+    def __init__(self, db=db_manager, version_ttl=KPI_VERSION_TTL, max_entries=KPI_CACHE_ENTRIES):
+        self.db = db
+        self.version_ttl = version_ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._version = None
+        self._version_checked = 0
+        self._version_lock = threading.Lock()
+        self.endpoints = {
+            '/kpis': self.kpis,
+            '/top-products': self.top_products,
+            '/categories': self.categories,
+            '/monthly': self.monthly,
+        }
+
+    def query(self, sql, **params):
+        return self.db.execute_query(text(sql), params)
+
+    def data_version(self):
+        with self._version_lock:
+            if self._version is None or time.monotonic() - self._version_checked >= self.version_ttl:
+                parts = []
+                for sql in VERSION_QUERIES:
+                    # Separate connections: a missing pipeline_runs table must not abort the next query
+                    try:
+                        with self.db.engine.connect() as conn:
+                            parts.append(tuple(conn.execute(text(sql)).fetchone()))
+                    except Exception:
+                        parts.append(None)
+                self._version = hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+                self._version_checked = time.monotonic()
+            return self._version
+
+    def kpis(self, params):
+        """Overview KPIs for [start, end] (default: the last 120 days) with period-over-period changes"""
+        end_date = _date_param(params, 'end', date.today())
+        start_date = _date_param(params, 'start', end_date - timedelta(days=120))
+        if start_date > end_date:
+            raise BadRequest("'start' must not be after 'end'")
+        prev_start_date, prev_end_date = previous_period(start_date, end_date)
+
+        current_df = self.query(SALES_SUMMARY_QUERY, start_date=start_date, end_date=end_date)
+        prev_df = self.query(SALES_SUMMARY_QUERY, start_date=prev_start_date, end_date=prev_end_date)
+        kpis = overview_kpis(current_df, prev_df)
+        return pd.DataFrame([{
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'previous_start_date': prev_start_date.isoformat(),
+            'previous_end_date': prev_end_date.isoformat(),
+            **{name: value.item() if hasattr(value, 'item') else value for name, value in kpis.items()},
+        }])
+
+    def top_products(self, params):
+        return self.query(TOP_PRODUCTS_QUERY, limit=_limit_param(params, 10))
+
+    def categories(self, params):
+        return self.query(CATEGORIES_QUERY)
+
+    def monthly(self, params):
+        return self.query(MONTHLY_QUERY, limit=_limit_param(params, 12))
+
+    def encode(self, df, fmt, single=False):
+        if fmt == 'arrow':
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            sink = io.BytesIO()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue()
+
+        records = json.loads(df.to_json(orient='records', date_format='iso'))
+        return json.dumps(records[0] if single else records).encode()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, path, params, fmt):
+        """Return (body, etag, version) for an endpoint, computing it only on a cache miss"""
+        version = self.data_version()
+        # Today's date is part of the key because it is the default end of the KPI range
+        key = (path, tuple(sorted(params.items())), date.today())
+
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and entry['version'] == version:
+                    self._cache.move_to_end(key)
+
+            if entry is None or entry['version'] != version:
+                try:
+                    frame = self.endpoints[path](params)
+                except Exception:
+                    with self._lock:
+                        if key not in self._cache:
+                            self._key_locks.pop(key, None)
+                    raise
+                entry = {'version': version, 'frame': frame, 'bodies': {}}
+                with self._lock:
+                    self._cache[key] = entry
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.max_entries:
+                        evicted, _ = self._cache.popitem(last=False)
+                        self._key_locks.pop(evicted, None)
+
+            if fmt not in entry['bodies']:
+                body = self.encode(entry['frame'], fmt, single=path == '/kpis')
+                etag = f'"{version}-{hashlib.sha256(body).hexdigest()[:16]}"'
+                entry['bodies'][fmt] = (body, etag)
+
+        body, etag = entry['bodies'][fmt]
+        return body, etag, version
+
+class KPIRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, body=b'', content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({'error': message}).encode())
+
+    def _format(self, params):
+        fmt = params.pop('format', None)
+        if fmt is None:
+            fmt = 'arrow' if ARROW_TYPE in self.headers.get('Accept', '') else 'json'
+        if fmt not in ('json', 'arrow'):
+            raise BadRequest("'format' must be 'json' or 'arrow'")
+        return fmt
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if url.path == '/health':
+            return self._send(200, b'{"status": "ok"}')
+        if url.path not in self.service.endpoints:
+            return self._error(404, f"Unknown endpoint {url.path}")
+
+        try:
+            fmt = self._format(params)
+            body, etag, version = self.service.get(url.path, params, fmt)
+        except BadRequest as e:
+            return self._error(400, str(e))
+        except ImportError:
+            return self._error(406, "Arrow output requires pyarrow")
+        except Exception as e:
+            logger.exception(f"KPI request {self.path} failed")
+            return self._error(500, str(e))
+
+        headers = {
+            'ETag': etag,
+            'X-Data-Version': version,
+            'Cache-Control': f'max-age={int(self.service.version_ttl)}',
+            'Vary': 'Accept',
+        }
+        if_none_match = self.headers.get('If-None-Match', '')
+        candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        if '*' in candidates or etag in candidates:
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        self._send(200, body, ARROW_TYPE if fmt == 'arrow' else 'application/json', headers)
+
+    def log_message(self, format, *args):
+        logger.info(f"{self.address_string()} {format % args}")
+
+def serve(host=KPI_SERVICE_HOST, port=KPI_SERVICE_PORT, service=None):
+    """Run the KPI service until interrupted"""
+    handler = type('Handler', (KPIRequestHandler,), {'service': service or KPIService()})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info(f"KPI service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    serve()
@@ -0,0 +1,34 @@
+import pandas as pd
+
+def previous_period(start_date, end_date):
+    """The equally long period immediately before [start_date, end_date]"""
+    period_days = (end_date - start_date).days
+    prev_start_date = start_date - pd.Timedelta(days=period_days + 1)
+    prev_end_date = start_date - pd.Timedelta(days=1)
+    return prev_start_date, prev_end_date
+
+def period_totals(daily_sales):
+    """Totals over sales_summary rows for one period"""
+    return {
+        'total_revenue': daily_sales['total_revenue'].sum(),
+        'total_orders': daily_sales['total_orders'].sum(),
+        'total_customers': daily_sales['total_customers'].sum(),  # This sums the daily counts
+        'avg_order_value': daily_sales['avg_order_value'].mean()  # This takes the average of the daily averages
+    }
+
+def percent_change(current, previous):
+    """Change from `previous` in percent, or 0 when there is nothing to compare against"""
+    if pd.notna(previous) and previous > 0:
+        return ((current - previous) / previous) * 100
+    return 0
+
+def overview_kpis(current_df, prev_df):
+    """Overview page KPIs: current period totals with period-over-period changes"""
+    current_totals = period_totals(current_df)
+    prev_totals = period_totals(prev_df)
+
+    current_totals['revenue_change'] = percent_change(current_totals['total_revenue'], prev_totals['total_revenue'])
+    current_totals['orders_change'] = percent_change(current_totals['total_orders'], prev_totals['total_orders'])
+    current_totals['customers_change'] = percent_change(current_totals['total_customers'], prev_totals['total_customers'])
+    current_totals['aov_change'] = percent_change(current_totals['avg_order_value'], prev_totals['avg_order_value'])
+    return current_totals
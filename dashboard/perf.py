@@ -0,0 +1,177 @@
+import json
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from config.settings import (
+    TELEMETRY_LOG_PATH, TELEMETRY_LOG_MAX_MB, TELEMETRY_LOG_BACKUPS, TELEMETRY_WINDOW, DASHBOARD_DEBUG
+)
+
+# Reference point for cold-start timing: the first import in this process
+PROCESS_STARTED = time.perf_counter()
+
+logger = logging.getLogger('dashboard.perf')
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+_lock = threading.Lock()
+_reruns = 0
+
+class RerunTimer:
+    """Times one execution of app.py and logs cold-start and per-interaction overhead"""
+    def __init__(self):
+        self.started = time.perf_counter()
+
+    def finish(self, page):
+        global _reruns
+        finished = time.perf_counter()
+        with _lock:
+            _reruns += 1
+            rerun = _reruns
+
+        duration_ms = (finished - self.started) * 1000
+        if rerun == 1:
+            cold_start_ms = (finished - PROCESS_STARTED) * 1000
+            logger.info(f"dashboard cold_start_ms={cold_start_ms:.1f} rerun_ms={duration_ms:.1f} page={page}")
+        else:
+            logger.info(f"dashboard rerun={rerun} rerun_ms={duration_ms:.1f} page={page}")
+        return duration_ms
+
+def query_shape(query):
+    """Collapse literals and whitespace so queries differing only in parameters group together"""
+    shape = re.sub(r"'[^']*'", '?', query)
+    shape = re.sub(r'\b\d+(\.\d+)?\b', '?', shape)
+    return ' '.join(shape.split())
+
+class Telemetry:
+    """Timings of dashboard queries and chart builds.
+
+    Every event is appended to a size-rotated JSON-lines log for offline
+    analysis. The most recent TELEMETRY_WINDOW events are also kept in
+    memory for the sidebar panel.
+    """
+    PAGE_KEY = 'telemetry_page'
+
+    def __init__(self, path=TELEMETRY_LOG_PATH, max_mb=TELEMETRY_LOG_MAX_MB, backups=TELEMETRY_LOG_BACKUPS, window=TELEMETRY_WINDOW):
+        self.path = path
+        self.max_bytes = max_mb * 1024 * 1024
+        self.backups = backups
+        self.events = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._log = None
+
+    def _get_log(self):
+        if self._log is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            log = logging.getLogger('dashboard.telemetry')
+            log.propagate = False
+            log.setLevel(logging.INFO)
+            if not log.handlers:
+                log.addHandler(logging.handlers.RotatingFileHandler(
+                    self.path, maxBytes=self.max_bytes, backupCount=self.backups
+                ))
+            self._log = log
+        return self._log
+
+    def set_page(self, page):
+        """Attribute this session's events to `page` (the session state is shared with query threads)"""
+        import streamlit as st
+        st.session_state[self.PAGE_KEY] = page
+
+    def current_page(self):
+        import streamlit as st
+        try:
+            return st.session_state.get(self.PAGE_KEY)
+        except Exception:
+            return None
+
+    def record(self, kind, name, latency_ms, rows=None, bytes=None, cache_hit=None, shape=None, error=None):
+        event = {
+            'ts': time.time(),
+            'kind': kind,
+            'name': name,
+            'page': self.current_page(),
+            'latency_ms': round(latency_ms, 2),
+            'rows': rows,
+            'bytes': bytes,
+            'cache_hit': cache_hit,
+            'shape': shape or name,
+            'error': error,
+        }
+        with self._lock:
+            self.events.append(event)
+        try:
+            self._get_log().info(json.dumps(event, default=str))
+        except OSError as e:
+            logger.warning(f"telemetry log unavailable: {e}")
+        return event
+
+    @contextmanager
+    def track(self, kind, name, rows=None):
+        """Time a block and record it, including the error if it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(kind, name, (time.perf_counter() - started) * 1000, rows=rows, error=repr(e))
+            raise
+        self.record(kind, name, (time.perf_counter() - started) * 1000, rows=rows)
+
+    def summary(self):
+        """Per-shape latency percentiles, cache hit rate and payload sizes, slowest p95 first"""
+        import pandas as pd
+        with self._lock:
+            events = pd.DataFrame(list(self.events))
+        if events.empty:
+            return events
+
+        grouped = events.groupby(['kind', 'shape'])
+        summary = pd.DataFrame({
+            'calls': grouped.size(),
+            'p50_ms': grouped['latency_ms'].quantile(0.5),
+            'p95_ms': grouped['latency_ms'].quantile(0.95),
+            'p99_ms': grouped['latency_ms'].quantile(0.99),
+            'max_ms': grouped['latency_ms'].max(),
+            'cache_hit_rate': grouped['cache_hit'].apply(lambda hits: hits.dropna().astype(float).mean()),
+            'avg_rows': grouped['rows'].mean(),
+            'avg_kb': grouped['bytes'].mean() / 1024,
+            'errors': grouped['error'].count(),
+            'pages': grouped['page'].apply(lambda pages: ', '.join(sorted(pages.dropna().unique()))),
+        })
+        return summary.round(2).sort_values('p95_ms', ascending=False).reset_index()
+
+    def slowest(self, n=10):
+        with self._lock:
+            events = list(self.events)
+        return sorted(events, key=lambda event: event['latency_ms'], reverse=True)[:n]
+
+    def debug_enabled(self):
+        """The panel is opt-in: DASHBOARD_DEBUG=1 or ?debug=1 in the URL"""
+        import streamlit as st
+        return DASHBOARD_DEBUG or st.experimental_get_query_params().get('debug') == ['1']
+
+    def render_panel(self):
+        """Sidebar panel with percentile stats and the slowest recent events"""
+        import pandas as pd
+        import streamlit as st
+        if not self.debug_enabled():
+            return
+
+        with st.sidebar.expander("⏱️ Performance", expanded=False):
+            summary = self.summary()
+            if summary.empty:
+                st.caption("No queries recorded yet")
+                return
+            st.caption(f"Last {len(self.events)} events in this process · log: {self.path}")
+            st.dataframe(summary, use_container_width=True, hide_index=True)
+            st.markdown("**Slowest events**")
+            slowest = pd.DataFrame(self.slowest())[['kind', 'name', 'page', 'latency_ms', 'rows', 'cache_hit', 'error']]
+            st.dataframe(slowest, use_container_width=True, hide_index=True)
+
+telemetry = Telemetry()
@@ -1,18 +1,124 @@
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from config.database import db_manager
+from config.settings import PANEL_QUERY_WORKERS, PANEL_QUERY_TIMEOUT
+from dashboard.perf import telemetry, query_shape
+
+QUEUE_POLL_INTERVAL = 0.25
+QUERY_ABORT_GRACE = 2
+
+@st.cache_resource
+def get_database():
+    """Database manager whose pooled engine is created once per process"""
+    db_manager.engine
+    return db_manager
 
 class DashboardUtils:
+    # Shared across reruns and sessions; per-query database timeouts keep slow queries from pinning workers
+    _executor = ThreadPoolExecutor(max_workers=PANEL_QUERY_WORKERS, thread_name_prefix='panel-query')
+
     def __init__(self):
-        self.db = db_manager
+        self._db = None
+        # Set by the cached query body, which only runs on a cache miss
+        self._query_ran = threading.local()
+    
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = get_database()
+        return self._db
     
     @st.cache_data
-    def load_data(_self, query):
-        """Load data with caching"""
-        return _self.db.execute_query(query)
+    def _cached_query(_self, query, _timeout=None):
+        _self._query_ran.value = True
+        return _self.db.execute_query(query, timeout=_timeout)
+    
+    def load_data(self, query, name=None, timeout=None):
+        """Load data with caching, recording latency, size and cache hits.
+
+        With ``timeout``, the database aborts the query after that many seconds
+        and a TimeoutError is raised.
+        """
+        self._query_ran.value = False
+        started = time.perf_counter()
+        try:
+            df = self._cached_query(query, _timeout=timeout)
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            timed_out = timeout is not None and elapsed >= timeout
+            telemetry.record('query', name, elapsed * 1000, cache_hit=False, shape=query_shape(query),
+                             error='timeout' if timed_out else repr(e))
+            if timed_out:
+                raise TimeoutError(f"Query '{name or query_shape(query)}' timed out after {timeout}s") from e
+            raise
+        telemetry.record(
+            'query', name, (time.perf_counter() - started) * 1000,
+            rows=len(df), bytes=int(df.memory_usage(deep=True).sum()),
+            cache_hit=not self._query_ran.value, shape=query_shape(query)
+        )
+        return df
+    
+    def track_chart(self, name, df=None):
+        """Context manager timing a chart's build and render"""
+        return telemetry.track('chart', name, rows=None if df is None else len(df))
+    
+    def load_data_concurrently(self, queries, timeout=PANEL_QUERY_TIMEOUT, timeouts=None):
+        """Run independent panel queries in parallel.
+
+        Yields (name, df, error) tuples in completion order so each panel can
+        render as soon as its data arrives. A query that runs longer than its
+        timeout (``timeouts[name]`` or ``timeout`` seconds) is aborted by the
+        database and yielded with a TimeoutError. The clock starts when the
+        query starts running, not while it waits for a free worker.
+        """
+        ctx = get_script_run_ctx()
+        timeouts = timeouts or {}
+        # Resolve the cached database on this thread before fanning out
+        self.db
+        running_since = {}
+        
+        def run(name, query):
+            # Attach the session context so st.cache_data works off the main thread
+            add_script_run_ctx(threading.current_thread(), ctx)
+            running_since[name] = time.monotonic()
+            return self.load_data(query, name, timeout=timeouts.get(name, timeout))
+        
+        futures = {self._executor.submit(run, name, query): name for name, query in queries.items()}
+        
+        def deadline(future):
+            name = futures[future]
+            if name not in running_since:
+                return None
+            # The database aborts the query at its timeout; the grace period covers a backend that fails to
+            return running_since[name] + timeouts.get(name, timeout) + QUERY_ABORT_GRACE
+        
+        pending = set(futures)
+        while pending:
+            deadlines = {f: deadline(f) for f in pending}
+            started = [d for d in deadlines.values() if d is not None]
+            remaining = min(started) - time.monotonic() if started else QUEUE_POLL_INTERVAL
+            if len(started) < len(pending):
+                # Queued queries have no deadline yet, so poll until they start running
+                remaining = min(remaining, QUEUE_POLL_INTERVAL)
+            done, pending = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+            
+            now = time.monotonic()
+            expired = {f for f in pending if deadlines[f] is not None and deadlines[f] <= now}
+            for future in expired:
+                name = futures[future]
+                telemetry.record('query', name, (now - running_since[name]) * 1000,
+                                 shape=query_shape(queries[name]), error='timeout')
+                yield name, None, TimeoutError(f"Query '{name}' timed out after {timeouts.get(name, timeout)}s")
+            pending -= expired
     
     def create_metric_cards(self, col1, col2, col3, col4, metrics):
         """Create metric cards"""
@@ -46,6 +152,8 @@ class DashboardUtils:
     
     def create_revenue_chart(self, df):
         """Create revenue trend chart"""
+        import plotly.express as px
+        
         fig = px.line(
             df, 
             x='summary_date', 
@@ -63,6 +171,8 @@ class DashboardUtils:
     
     def create_category_chart(self, df):
         """Create category performance chart"""
+        import plotly.express as px
+        
         fig = px.treemap(
             df,
             path=['category', 'subcategory'],
@@ -73,6 +183,9 @@ class DashboardUtils:
     
     def create_customer_segment_chart(self, df):
         """Create customer segment analysis chart"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        
         fig = make_subplots(
             rows=1, cols=2,
             subplot_titles=('Customers by Segment', 'Revenue by Segment'),
@@ -104,6 +217,9 @@ class DashboardUtils:
     
     def create_growth_chart(self, df):
         """Create monthly growth chart"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        
         fig = make_subplots(
             rows=2, cols=1,
             subplot_titles=('Monthly Revenue', 'Growth Rate %'),
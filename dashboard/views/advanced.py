@@ -0,0 +1,86 @@
+import streamlit as st
+import numpy as np
+from dashboard.utils import utils
+
+def render(start_date, end_date):
+    """Monthly growth, revenue forecast and key insights"""
+    st.title("📊 Advanced Analytics")
+    st.markdown("Growth trends, forecasting, and business intelligence")
+    
+    growth_container = st.container()
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📈 Revenue Forecast")
+    with col2:
+        st.subheader("🎯 Key Insights")
+    
+    panels = utils.load_data_concurrently({
+        'growth': "SELECT * FROM monthly_summary ORDER BY order_month DESC LIMIT 12",
+        'forecast': """
+            SELECT summary_date, total_revenue 
+            FROM sales_summary 
+            ORDER BY summary_date DESC 
+            LIMIT 60
+        """,
+        'insights': """
+            SELECT 
+                (SELECT COUNT(*) FROM customers WHERE customer_segment = 'Premium') as premium_customers,
+                (SELECT AVG(profit_margin) FROM products) as avg_profit_margin,
+                (SELECT p.category FROM product_metrics pm JOIN products p ON pm.product_id = p.product_id ORDER BY pm.total_revenue DESC LIMIT 1) as top_category
+        """
+    })
+    
+    for name, data, error in panels:
+        if name == 'growth':
+            with growth_container:
+                # Monthly growth analysis
+                try:
+                    if error is not None:
+                        raise error
+                    with utils.track_chart('monthly_growth', data):
+                        st.plotly_chart(
+                            utils.create_growth_chart(data.copy()),
+                            use_container_width=True
+                        )
+                except Exception as e:
+                    st.error(f"Error loading growth data: {e}")
+        
+        elif name == 'forecast':
+            with col1:
+                try:
+                    if error is not None:
+                        raise error
+                    # Simple linear forecast (demonstration)
+                    recent_revenue = data.copy()
+            
+                    if len(recent_revenue) > 0:
+                        # Calculate trend
+                        recent_revenue['days'] = range(len(recent_revenue))
+                        trend = np.polyfit(recent_revenue['days'], recent_revenue['total_revenue'], 1)
+                        
+                        # Create forecast
+                        future_days = range(len(recent_revenue), len(recent_revenue) + 7)
+                        forecast = [trend * day + trend for day in future_days]
+                        
+                        st.write(f"📊 **Average Daily Revenue**: ${recent_revenue['total_revenue'][0].mean():,.2f}")
+                        st.write(f"📈 **Trend**: ${trend[0]:.2f}+ per day")
+                        st.write(f"🔮 **7-Day Forecast**: ${sum(forecast)[0]:,.2f}")
+                    
+                except Exception as e:
+                    st.error(f"Forecast calculation error: {e}")
+        
+        elif name == 'insights':
+            with col2:
+                try:
+                    if error is not None:
+                        raise error
+                    # Business insights
+                    if len(data) > 0:
+                        insight = data.iloc[0]
+                        st.write(f"👑 **Premium Customers**: {insight['premium_customers']:,}")
+                        st.write(f"💰 **Avg Profit Margin**: {insight['avg_profit_margin']:.1f}%")
+                        st.write(f"🏆 **Top Category**: {insight['top_category']}")
+                    
+                except Exception as e:
+                    st.error(f"Insights calculation error: {e}")
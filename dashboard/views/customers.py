@@ -0,0 +1,64 @@
+import streamlit as st
+import plotly.express as px
+from dashboard.utils import utils
+
+def render(start_date, end_date):
+    """Customer segmentation and retention"""
+    st.title("👥 Customer Analytics")
+    st.markdown("Customer segmentation, behavior, and retention analysis")
+    
+    col1, col2 = st.columns(2)
+    customer_analysis = None
+    
+    panels = utils.load_data_concurrently({
+        'segments': "SELECT cm.*, c.customer_segment FROM customer_metrics cm JOIN customers c ON cm.customer_id = c.customer_id",
+        'retention': "SELECT customer_id, last_order, customer_lifetime_days FROM customer_metrics ORDER BY last_order DESC LIMIT 12"
+    })
+    
+    for name, data, error in panels:
+        if name == 'segments':
+            with col1:
+                # Customer segmentation
+                try:
+                    if error is not None:
+                        raise error
+                    customer_analysis = data
+                    with utils.track_chart('customer_segments', customer_analysis):
+                        st.plotly_chart(
+                            utils.create_customer_segment_chart(customer_analysis),
+                            use_container_width=True
+                        )
+                except Exception as e:
+                    st.error(f"Error loading customer analysis: {e}")
+        
+        elif name == 'retention':
+            with col2:
+                # Customer retention
+                try:
+                    if error is not None:
+                        raise error
+                    retention_data = data.copy()
+                    retention_data['customer_id'] = retention_data['customer_id'].astype(str)
+                    with utils.track_chart('customer_retention', retention_data):
+                        fig = px.bar(
+                            retention_data,
+                            x='customer_id',
+                            y='customer_lifetime_days',
+                            title='Customer Lifetime (in Days) for 12 Most Recent Customers',
+                            labels={'customer_lifetime_days': 'Customer Since (in Days)', 'customer_id': 'Customer ID'}
+                        )
+
+                        fig.update_xaxes(type='category')
+                        st.plotly_chart(fig, use_container_width=True)
+                except Exception as e:
+                    st.error(f"Error loading retention data: {e}")
+    
+    # Customer metrics table
+    st.subheader("📊 Customer Segment Details")
+    if customer_analysis is not None:
+        st.dataframe(
+            customer_analysis,
+            use_container_width=True
+        )
+    else:
+        st.info("Customer analysis data not available")
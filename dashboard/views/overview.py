@@ -0,0 +1,78 @@
+import streamlit as st
+import plotly.express as px
+from dashboard.kpis import previous_period, overview_kpis
+from dashboard.utils import utils
+
+def render(start_date, end_date):
+    """Sales overview: KPIs with period-over-period deltas and daily trends"""
+    st.title("📈 Sales Overview Dashboard")
+    st.markdown("Real-time business intelligence and key performance indicators")
+
+    # Calculate the previous period for comparison
+    prev_start_date, prev_end_date = previous_period(start_date, end_date)
+
+    # Query the sales_summary table for BOTH periods concurrently
+    panels = utils.load_data_concurrently({
+        'current': f"""
+            SELECT * FROM sales_summary 
+            WHERE summary_date BETWEEN '{start_date}' AND '{end_date}'
+            ORDER BY summary_date DESC
+        """,
+        'previous': f"SELECT * FROM sales_summary WHERE summary_date BETWEEN '{prev_start_date}' AND '{prev_end_date}'"
+    })
+
+    metrics_container = st.container()
+    charts_container = st.container()
+    results = {}
+
+    for name, data, error in panels:
+        if error is not None:
+            st.error(f"Error loading data: {error}")
+            continue
+        results[name] = data
+
+        if name == 'current':
+            daily_sales = data
+            with charts_container:
+                if len(daily_sales) > 0:
+                    # Charts
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        with utils.track_chart('revenue_trend', daily_sales):
+                            st.plotly_chart(
+                                utils.create_revenue_chart(daily_sales),
+                                use_container_width=True
+                            )
+                    
+                    with col2:
+                        # Orders vs Customers chart
+                        with utils.track_chart('orders_vs_customers', daily_sales):
+                            fig = px.line(
+                                daily_sales,
+                                x='summary_date',
+                                y=['total_orders', 'total_customers'],
+                                labels={'summary_date': 'Date'},
+                                title='Orders vs Customers Trend'
+                            )
+                            st.plotly_chart(fig, use_container_width=True)
+                    
+                    # Recent performance table
+                    st.subheader("📋 Recent Performance (Last 7 Days)")
+                    recent_data = daily_sales.head(7)
+                    st.dataframe(
+                        recent_data[['summary_date', 'total_orders', 'total_revenue', 'total_customers', 'avg_order_value']],
+                        use_container_width=True
+                    )
+                
+                else:
+                    st.warning("No data found for the selected date range.")
+
+    if 'current' in results and 'previous' in results:
+        # Totals for each period and the percentage changes (deltas)
+        current_totals = overview_kpis(results['current'], results['previous'])
+
+        # And pass the complete object to your function
+        with metrics_container:
+            col1, col2, col3, col4 = st.columns(4)
+            utils.create_metric_cards(col1, col2, col3, col4, current_totals)
@@ -0,0 +1,74 @@
+import streamlit as st
+from dashboard.utils import utils
+
+def render(start_date, end_date):
+    """Category revenue and top products"""
+    st.title("📦 Product Performance")
+    st.markdown("Product sales, category analysis, and inventory insights")
+    
+    col1, col2 = st.columns([2, 1])
+    category_data = None
+    
+    panels = utils.load_data_concurrently({
+        'categories': """
+            SELECT 
+                p.product_name,
+                p.category,
+                p.subcategory,
+                pm.total_quantity_sold,
+                pm.total_revenue,
+                pm.unique_orders,
+                pm.product_id
+            FROM product_metrics pm
+            JOIN products p ON pm.product_id = p.product_id
+        """,
+        'top_products': """
+            SELECT 
+                p.product_name,
+                pm.total_quantity_sold,
+                pm.total_revenue
+            FROM product_metrics pm
+            JOIN products p ON pm.product_id = p.product_id
+            ORDER BY pm.total_revenue DESC
+            LIMIT 10
+        """
+    })
+    
+    for name, data, error in panels:
+        if name == 'categories':
+            with col1:
+                # Category performance
+                try:
+                    if error is not None:
+                        raise error
+                    category_data = data
+                    with utils.track_chart('category_treemap', category_data):
+                        st.plotly_chart(
+                            utils.create_category_chart(category_data),
+                            use_container_width=True
+                        )
+                except Exception as e:
+                    st.error(f"Error loading category data: {e}")
+        
+        elif name == 'top_products':
+            with col2:
+                # Top products
+                try:
+                    if error is not None:
+                        raise error
+                    st.subheader("🏆 Top 10 Products")
+                    for _, product in data.iterrows():
+                        st.metric(
+                            label=product['product_name'][:60] + "...",
+                            value=f"${product['total_revenue']:,.0f}",
+                            delta=f"{product['total_quantity_sold']} units"
+                        )
+                except Exception as e:
+                    st.error(f"Error loading top products: {e}")
+    
+    # Category performance table
+    st.subheader("📊 Category Performance Details")
+    if category_data is not None:
+        st.dataframe(category_data, use_container_width=True)
+    else:
+        st.info("Category performance data not available")
@@ -0,0 +1,118 @@
+import pandas as pd
+import numpy as np
+import os
+import shutil
+import tempfile
+from config.settings import AGG_MEMORY_BUDGET_MB, AGG_SPILL_PARTITIONS, AGG_SPILL_PATH
+
+class SpillPartitions:
+    """Hash-partitioned spill files for one aggregation.
+
+    `level` selects which base-`partitions` digit of the 64-bit key hash
+    routes rows, so re-partitioning an oversized partition at the next level
+    splits it instead of sending every row to the same place again.
+    """
+    def __init__(self, spill_path, partitions, level=0):
+        os.makedirs(spill_path, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix=f'agg-{level}-', dir=spill_path)
+        self.partitions = partitions
+        self.level = level
+        self.files = [[] for _ in range(partitions)]
+        self.sizes = [0] * partitions
+
+    def write(self, chunk, by):
+        """Route each row of `chunk` to the spill file of its key's partition"""
+        keys = chunk[by]
+        # Chunks with nulls read integer keys as floats; route both the same way
+        values = keys.to_numpy(dtype='float64') if keys.dtype.kind in 'iuf' else keys.to_numpy()
+        hashes = pd.util.hash_array(values)
+        partitions = np.uint64(self.partitions)
+        partition_ids = hashes // partitions ** np.uint64(self.level) % partitions
+        for partition in np.unique(partition_ids):
+            rows = chunk.take(np.flatnonzero(partition_ids == partition))
+            path = f'{self.directory}/part-{int(partition):03d}-{len(self.files[partition]):06d}.pkl'
+            rows.to_pickle(path)
+            self.files[partition].append(path)
+            self.sizes[partition] += int(rows.memory_usage(deep=True).sum())
+
+    def chunks(self, partition):
+        for path in self.files[partition]:
+            yield pd.read_pickle(path)
+
+    def read(self, partition):
+        return pd.concat(self.chunks(partition))
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class SpillAggregator:
+    """Group-by aggregation over chunked input that spills to disk beyond a memory budget.
+
+    Chunks are buffered until they exceed the budget; from then on rows are
+    hash-partitioned by group key into spill files. Every group lands wholly
+    in one partition, so each partition is aggregated on its own and the
+    sorted concatenation matches the in-memory groupby exactly. A partition
+    still over budget is re-partitioned on other hash bits, up to MAX_DEPTH
+    levels (a single huge group cannot be split further).
+    """
+    MAX_DEPTH = 4
+
+    def __init__(self, memory_budget_mb=AGG_MEMORY_BUDGET_MB, partitions=AGG_SPILL_PARTITIONS, spill_path=AGG_SPILL_PATH):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.partitions = partitions
+        self.spill_path = spill_path
+
+    def aggregate(self, data, by, spec):
+        """Equivalent of `data.groupby(by).agg(spec)` for a DataFrame or an iterable of DataFrame chunks.
+
+        A DataFrame is already in memory, so spilling it could not lower peak
+        memory and it is grouped directly; pass chunks to stay within budget.
+        """
+        if isinstance(data, pd.DataFrame):
+            return data.groupby(by).agg(spec)
+
+        columns = [by] + [column for column in spec if column != by]
+        buffered, size, spill = [], 0, None
+        try:
+            for chunk in data:
+                chunk = chunk[columns]
+                if spill is None:
+                    buffered.append(chunk)
+                    size += chunk.memory_usage(deep=True).sum()
+                    if size > self.memory_budget:
+                        spill = SpillPartitions(self.spill_path, self.partitions)
+                        for buffered_chunk in buffered:
+                            spill.write(buffered_chunk, by)
+                        buffered = []
+                else:
+                    spill.write(chunk, by)
+
+            if spill is None:
+                if not buffered:
+                    raise ValueError("No data to aggregate")
+                return pd.concat(buffered).groupby(by).agg(spec)
+
+            print(f"Aggregating {by} out of core across {self.partitions} spill partitions")
+            return self._aggregate_spilled(spill, by, spec)
+        finally:
+            if spill is not None:
+                spill.cleanup()
+
+    def _aggregate_spilled(self, spill, by, spec):
+        results = []
+        for partition in range(spill.partitions):
+            if not spill.files[partition]:
+                continue
+            if spill.sizes[partition] <= self.memory_budget or spill.level + 1 >= self.MAX_DEPTH:
+                results.append(spill.read(partition).groupby(by).agg(spec))
+                continue
+
+            # Too big to read back whole: split it again on the next hash digit
+            nested = SpillPartitions(self.spill_path, self.partitions, level=spill.level + 1)
+            try:
+                for chunk in spill.chunks(partition):
+                    nested.write(chunk, by)
+                results.append(self._aggregate_spilled(nested, by, spec))
+            finally:
+                nested.cleanup()
+        return pd.concat(results).sort_index()
@@ -0,0 +1,108 @@
+import pandas as pd
+import hashlib
+import json
+import os
+import shutil
+import time
+from config.settings import CHECKPOINT_PATH, CHECKPOINT_MAX_MB, CHECKPOINT_MAX_AGE_DAYS
+
+class StageCache:
+    """Content-addressed on-disk checkpoints for pipeline stage outputs.
+
+    A stage's key is a hash of its inputs and of the source code that
+    produces it, so any change to either misses the cache. Checkpoints are
+    evicted oldest-first beyond CHECKPOINT_MAX_MB or CHECKPOINT_MAX_AGE_DAYS.
+    """
+    def __init__(self, path=CHECKPOINT_PATH, max_mb=CHECKPOINT_MAX_MB, max_age_days=CHECKPOINT_MAX_AGE_DAYS):
+        self.path = path
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_age = max_age_days * 24 * 3600
+
+    @staticmethod
+    def key(*parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_files(paths):
+        """Hash the contents of files (e.g. raw inputs or source modules)"""
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(path.encode())
+            with open(path, 'rb') as file:
+                for block in iter(lambda: file.read(1024 * 1024), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    @classmethod
+    def code_version(cls, *modules):
+        """Hash of the source files behind the given modules"""
+        return cls.hash_files([module.__file__ for module in modules])
+
+    def _directory(self, stage, key):
+        return f'{self.path}/{stage}-{key[:32]}'
+
+    def has(self, stage, key):
+        return os.path.exists(f'{self._directory(stage, key)}/meta.json')
+
+    def load(self, stage, key):
+        """Return (tables, meta) for a checkpoint, or (None, None) on a miss"""
+        directory = self._directory(stage, key)
+        if not self.has(stage, key):
+            return None, None
+        with open(f'{directory}/meta.json') as f:
+            meta = json.load(f)
+        tables = {table_name: pd.read_pickle(f'{directory}/{table_name}.pkl') for table_name in meta['tables']}
+        os.utime(f'{directory}/meta.json')
+        return tables, meta
+
+    def discard(self, stage, key=None):
+        """Remove a stage's checkpoint for `key`, or every checkpoint of the stage without one"""
+        if key is not None:
+            shutil.rmtree(self._directory(stage, key), ignore_errors=True)
+            return
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.startswith(f'{stage}-'):
+                    shutil.rmtree(f'{self.path}/{name}', ignore_errors=True)
+
+    def save(self, stage, key, tables=None, **meta):
+        """Write a checkpoint atomically; `tables` maps names to DataFrames"""
+        tables = tables or {}
+        directory = self._directory(stage, key)
+        tmp_directory = f'{directory}.tmp'
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+
+        for table_name, df in tables.items():
+            df.to_pickle(f'{tmp_directory}/{table_name}.pkl')
+        meta.update({'stage': stage, 'key': key, 'created_at': time.time(), 'tables': list(tables)})
+        with open(f'{tmp_directory}/meta.json', 'w') as f:
+            json.dump(meta, f)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_directory, directory)
+        self.evict()
+
+    def evict(self):
+        """Drop checkpoints past the age limit, then the least recently used beyond the size limit"""
+        if not os.path.isdir(self.path):
+            return
+        checkpoints = []
+        for name in os.listdir(self.path):
+            directory = f'{self.path}/{name}'
+            meta_path = f'{directory}/meta.json'
+            if not os.path.exists(meta_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(directory))
+            checkpoints.append((os.path.getmtime(meta_path), size, directory))
+
+        now = time.time()
+        total = sum(size for _, size, _ in checkpoints)
+        for used_at, size, directory in sorted(checkpoints):
+            if now - used_at > self.max_age or total > self.max_bytes:
+                shutil.rmtree(directory, ignore_errors=True)
+                total -= size
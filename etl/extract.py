@@ -1,13 +1,53 @@
 import pandas as pd
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
+import asyncio
+import codecs
 import json
 import os
+from config.settings import (
+    API_CONCURRENCY, API_RATE_LIMIT, API_MAX_RETRIES,
+    API_BACKOFF_SECONDS, API_TIMEOUT, API_CHUNK_SIZE,
+    INCREMENTAL_PATH, INCREMENTAL_CHUNK_ROWS
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class RetryableHTTPError(requests.HTTPError):
+    """HTTP error worth retrying (throttling or a transient server failure)"""
+    def __init__(self, response):
+        super().__init__(f"API request failed with status code: {response.status_code}", response=response)
+        retry_after = response.headers.get('Retry-After', '')
+        self.retry_after = float(retry_after) if retry_after.replace('.', '', 1).isdigit() else None
+
+class RateLimiter:
+    """Space out request starts to at most `rate` requests per second"""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+    
+    async def wait(self):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
 
 class DataExtractor:
+    RAW_FILES = ['customers.csv', 'products.csv', 'orders.csv', 'order_items.csv']
+    # Written into an incremental batch directory once the batch is in the warehouse
+    APPLIED_MARKER = '_APPLIED'
+    
     def __init__(self):
         self.base_path = 'data/raw'
+        self.incremental_path = INCREMENTAL_PATH
         os.makedirs(self.base_path, exist_ok=True)
     
     def generate_synthetic_ecommerce_data(self):
@@ -124,10 +164,206 @@ class DataExtractor:
             print(f"Error extracting from API: {e}")
             return None
     
+    def _api_session(self, concurrency):
+        """HTTP session with a connection pool sized for `concurrency` requests"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def _iter_json_records(self, response, records_key=None):
+        """Incrementally parse records from a streamed JSON response.
+
+        NDJSON bodies and top-level JSON arrays are decoded record by record
+        as bytes arrive. Any other body is parsed whole and its records are
+        taken from `records_key` (or the object itself).
+        """
+        text_decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+        chunks = (text_decoder.decode(chunk) for chunk in response.iter_content(chunk_size=64 * 1024))
+        content_type = response.headers.get('Content-Type', '')
+        
+        if 'ndjson' in content_type or 'jsonl' in content_type:
+            buffer = ''
+            for chunk in chunks:
+                buffer += chunk
+                *lines, buffer = buffer.split('\n')
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+            if buffer.strip():
+                yield json.loads(buffer)
+            return
+        
+        buffer = ''
+        for chunk in chunks:
+            buffer += chunk
+            if buffer.strip():
+                break
+        buffer = buffer.lstrip()
+        
+        if not buffer.startswith('['):
+            body = json.loads(buffer + ''.join(chunks))
+            if records_key:
+                body = body.get(records_key) or []
+            yield from (body if isinstance(body, list) else [body])
+            return
+        
+        decoder = json.JSONDecoder()
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,')
+            if buffer.startswith(']'):
+                return
+            try:
+                record, end = decoder.raw_decode(buffer)
+                # A value ending exactly at the buffer edge may be a truncated number
+                if end == len(buffer):
+                    raise ValueError("Incomplete JSON value")
+            except ValueError:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    if buffer:
+                        record, end = decoder.raw_decode(buffer)
+                    else:
+                        raise ValueError("Unterminated JSON array in API response")
+                else:
+                    buffer += chunk
+                    continue
+            yield record
+            buffer = buffer[end:]
+    
+    def _fetch_page(self, session, api_url, params, records_key, chunk_size):
+        """Fetch one API page and return its records as DataFrame chunks"""
+        with session.get(api_url, params=params, timeout=API_TIMEOUT, stream=True) as response:
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise RetryableHTTPError(response)
+            response.raise_for_status()
+            
+            frames = []
+            batch = []
+            for record in self._iter_json_records(response, records_key):
+                batch.append(record)
+                if len(batch) >= chunk_size:
+                    frames.append(pd.DataFrame.from_records(batch))
+                    batch = []
+            if batch:
+                frames.append(pd.DataFrame.from_records(batch))
+            return frames
+    
+    async def _afetch_page(self, session, limiter, api_url, params=None, records_key=None,
+                           max_retries=API_MAX_RETRIES, chunk_size=API_CHUNK_SIZE):
+        """Fetch one page off the event loop, retrying transient failures with exponential backoff"""
+        for attempt in range(max_retries + 1):
+            await limiter.wait()
+            try:
+                return await asyncio.to_thread(self._fetch_page, session, api_url, params, records_key, chunk_size)
+            except (RetryableHTTPError, requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == max_retries:
+                    print(f"Error extracting from API {api_url} {params or ''}: {e}")
+                    raise
+                delay = API_BACKOFF_SECONDS * 2 ** attempt
+                if getattr(e, 'retry_after', None):
+                    delay = max(delay, e.retry_after)
+                await asyncio.sleep(delay)
+    
+    async def aextract_from_api(self, api_url, params=None, records_key=None, page_param='page',
+                                start_page=1, max_pages=None, concurrency=API_CONCURRENCY,
+                                rate_limit=API_RATE_LIMIT, max_retries=API_MAX_RETRIES,
+                                chunk_size=API_CHUNK_SIZE):
+        """Asynchronously extract a paginated API, yielding DataFrame chunks.
+
+        Up to `concurrency` pages are in flight at once. Paging stops at the
+        first empty page or after `max_pages`. Chunks are yielded as pages
+        complete, so they are not guaranteed to arrive in page order.
+        """
+        session = self._api_session(concurrency)
+        limiter = RateLimiter(rate_limit)
+        last_page = start_page + max_pages - 1 if max_pages else None
+        next_page = start_page
+        exhausted = False
+        pending = set()
+        
+        def schedule():
+            nonlocal next_page
+            while not exhausted and len(pending) < concurrency and (last_page is None or next_page <= last_page):
+                page_params = dict(params or {}, **{page_param: next_page})
+                pending.add(asyncio.create_task(self._afetch_page(
+                    session, limiter, api_url, page_params, records_key, max_retries, chunk_size
+                )))
+                next_page += 1
+        
+        try:
+            schedule()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+                for task in done:
+                    frames = task.result()
+                    if not frames:
+                        exhausted = True
+                    for frame in frames:
+                        yield frame
+                schedule()
+        finally:
+            for task in pending:
+                task.cancel()
+            session.close()
+    
+    async def aextract_from_endpoints(self, urls, records_key=None, concurrency=API_CONCURRENCY,
+                                      rate_limit=API_RATE_LIMIT, max_retries=API_MAX_RETRIES,
+                                      chunk_size=API_CHUNK_SIZE):
+        """Asynchronously extract several unpaginated endpoints, yielding DataFrame chunks"""
+        session = self._api_session(concurrency)
+        limiter = RateLimiter(rate_limit)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch(url):
+            async with semaphore:
+                return await self._afetch_page(session, limiter, url, None, records_key, max_retries, chunk_size)
+        
+        tasks = [asyncio.create_task(fetch(url)) for url in urls]
+        try:
+            for task in asyncio.as_completed(tasks):
+                for frame in await task:
+                    yield frame
+        finally:
+            for task in tasks:
+                task.cancel()
+            session.close()
+    
+    def _iter_async(self, agen):
+        """Drive an async generator from synchronous code"""
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.close()
+    
+    def extract_from_api_pages(self, api_url, **kwargs):
+        """Extract a paginated API as a stream of DataFrame chunks.
+
+        Each chunk can go straight to the matching DataTransformer.clean_* method.
+        """
+        return self._iter_async(self.aextract_from_api(api_url, **kwargs))
+    
+    def extract_from_endpoints(self, urls, **kwargs):
+        """Extract several endpoints concurrently as a stream of DataFrame chunks"""
+        return self._iter_async(self.aextract_from_endpoints(urls, **kwargs))
+    
+    def raw_file_paths(self):
+        return [f'{self.base_path}/{file}' for file in self.RAW_FILES]
+    
     def extract_from_files(self):
         """Extract data from CSV files"""
         data = {}
-        files = ['customers.csv', 'products.csv', 'orders.csv', 'order_items.csv']
+        files = self.RAW_FILES
         
         for file in files:
             file_path = f'{self.base_path}/{file}'
@@ -146,6 +382,36 @@ class DataExtractor:
         
         return data
 
+    def incremental_batches(self):
+        """Incremental batch directories not yet applied to the warehouse, oldest (by name) first"""
+        if not os.path.isdir(self.incremental_path):
+            return []
+        return sorted(
+            batch for batch in os.listdir(self.incremental_path)
+            if os.path.isdir(f'{self.incremental_path}/{batch}')
+            and not os.path.exists(f'{self.incremental_path}/{batch}/{self.APPLIED_MARKER}')
+        )
+    
+    def extract_batch_chunks(self, batch, table_name, chunk_rows=INCREMENTAL_CHUNK_ROWS):
+        """Yield one table of an incremental batch as DataFrames of at most `chunk_rows` rows"""
+        file_path = f'{self.incremental_path}/{batch}/{table_name}.csv'
+        if not os.path.exists(file_path):
+            return
+        for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+            print(f"Extracted {len(chunk)} records from {batch}/{table_name}.csv")
+            yield chunk
+    
+    def mark_batch_applied(self, batch):
+        with open(f'{self.incremental_path}/{batch}/{self.APPLIED_MARKER}', 'w') as f:
+            f.write(datetime.now().isoformat())
+    
+    def reset_applied_batches(self):
+        """Mark every incremental batch as pending again, e.g. after the warehouse was rebuilt"""
+        for batch in os.listdir(self.incremental_path) if os.path.isdir(self.incremental_path) else []:
+            marker = f'{self.incremental_path}/{batch}/{self.APPLIED_MARKER}'
+            if os.path.exists(marker):
+                os.remove(marker)
+
 if __name__ == "__main__":
     extractor = DataExtractor()
     data = extractor.extract_from_files()
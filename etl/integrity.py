@@ -0,0 +1,80 @@
+import numpy as np
+from etl.validation import describe_failures
+
+# (child table, child column, parent table, parent column), parents before children
+FOREIGN_KEYS = [
+    ('orders', 'customer_id', 'customers', 'customer_id'),
+    ('order_items', 'order_id', 'orders', 'order_id'),
+    ('order_items', 'product_id', 'products', 'product_id'),
+]
+
+class IntegrityResolver:
+    """Drop rows whose foreign keys reference missing parents before they reach the database.
+
+    With `key_indexes`, a parent also counts as present when it was loaded in
+    an earlier batch or run.
+    """
+    def __init__(self, validator, foreign_keys=None, key_indexes=None):
+        self.validator = validator
+        self.foreign_keys = foreign_keys or FOREIGN_KEYS
+        self.key_indexes = key_indexes
+
+    def key_index(self, df, column):
+        """Sorted array of the distinct keys in a parent table"""
+        return np.unique(df[column].dropna().to_numpy())
+
+    def orphans(self, values, keys):
+        """Boolean array marking non-null values that are not in `keys`"""
+        notnull = values.notna().to_numpy()
+        array = values.to_numpy()
+        if len(keys) == 0:
+            return notnull
+        positions = np.searchsorted(keys, array).clip(max=len(keys) - 1)
+        return notnull & (keys[positions] != array)
+
+    def missing(self, values, parent, parent_column, data_dict):
+        """Boolean array marking values whose parent is neither in this batch nor already loaded"""
+        if parent in data_dict:
+            missing = self.orphans(values, self.key_index(data_dict[parent], parent_column))
+        else:
+            missing = values.notna().to_numpy()
+        if self.key_indexes is not None and missing.any():
+            missing[missing] = ~self.key_indexes.loaded(parent, parent_column, values[missing])
+        return missing
+
+    def resolve(self, data_dict):
+        """Resolve every foreign key in one vectorized pass per child table.
+
+        Children are processed in dependency order, so removing an orphaned
+        order also removes its items. A parent key counts as present if it is
+        in the batch or, with `key_indexes`, was loaded earlier. Orphans are
+        quarantined through the validator with FK_<TABLE>_<COLUMN> rule codes.
+        """
+        children = list(dict.fromkeys(child for child, _, _, _ in self.foreign_keys))
+
+        for table_name in children:
+            if table_name not in data_dict:
+                continue
+            df = data_dict[table_name]
+            # Without an index, parents outside the batch cannot be checked
+            relations = [
+                (column, parent, parent_column)
+                for child, column, parent, parent_column in self.foreign_keys
+                if child == table_name and (parent in data_dict or self.key_indexes is not None)
+            ]
+
+            failures = np.zeros(len(df), dtype=np.uint64)
+            codes = []
+            for bit, (column, parent, parent_column) in enumerate(relations):
+                missing = self.missing(df[column], parent, parent_column, data_dict)
+                failures |= missing.astype(np.uint64) << np.uint64(bit)
+                codes.append(f'FK_{table_name.upper()}_{column.upper()}')
+
+            self.validator.count(table_name, failures, codes)
+            orphaned = failures != 0
+            if orphaned.any():
+                self.validator.reject(df.take(np.flatnonzero(orphaned)), table_name, describe_failures(failures[orphaned], codes))
+                data_dict[table_name] = df.take(np.flatnonzero(~orphaned))
+                print(f"Removed {int(orphaned.sum())} orphaned records from {table_name}")
+
+        return data_dict
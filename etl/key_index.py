@@ -0,0 +1,162 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import shutil
+import threading
+from config.settings import KEY_INDEX_PATH
+
+# Natural key checked across runs for each table
+NATURAL_KEYS = {
+    'customers': 'email',
+    'products': 'product_id',
+    'orders': 'order_id',
+    'order_items': 'item_id',
+}
+
+# Keys that child tables reference, so foreign keys can resolve against earlier loads
+REFERENCED_KEYS = {
+    'customers': 'customer_id',
+    'products': 'product_id',
+    'orders': 'order_id',
+}
+
+def key_columns(table_name):
+    """Columns of `table_name` whose loaded values are indexed"""
+    return sorted({NATURAL_KEYS.get(table_name), REFERENCED_KEYS.get(table_name)} - {None})
+
+class KeyIndex:
+    """Set of 64-bit key hashes stored as an open-addressing hash table in a memory-mapped file.
+
+    Lookups touch only the probed slots, so membership checks cost roughly
+    constant time per key without reading the whole index into RAM.
+    """
+    MAX_LOAD = 0.5
+    RESIZE_BLOCK = 1 << 20
+
+    def __init__(self, path, initial_capacity=1 << 16):
+        self.path = path
+        self.meta_path = f'{path}.meta'
+        if os.path.exists(path) and os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                self.count = json.load(f)['count']
+            self.table = np.memmap(path, dtype=np.uint64, mode='r+')
+        else:
+            self.count = 0
+            self.table = np.memmap(path, dtype=np.uint64, mode='w+', shape=(initial_capacity,))
+            self.flush()
+
+    @staticmethod
+    def hash_keys(values):
+        """Stable 64-bit hashes for a Series of non-null keys (0 is reserved for empty slots)"""
+        if values.dtype.kind == 'f':
+            values = values.astype('int64')
+        hashes = pd.util.hash_array(values.to_numpy())
+        hashes[hashes == 0] = 1
+        return hashes
+
+    @staticmethod
+    def _probe(table, hashes):
+        """Linear-probe every hash at once; return final slots and whether each hash was found"""
+        mask = np.uint64(len(table) - 1)
+        slots = hashes & mask
+        found = np.zeros(len(hashes), dtype=bool)
+        active = np.arange(len(hashes))
+        while active.size:
+            current = table[slots[active]]
+            hit = current == hashes[active]
+            found[active[hit]] = True
+            active = active[~(hit | (current == 0))]
+            slots[active] = (slots[active] + np.uint64(1)) & mask
+        return slots, found
+
+    @classmethod
+    def _insert(cls, table, hashes):
+        """Insert distinct hashes into `table`; return how many were new"""
+        slots, found = cls._probe(table, hashes)
+        pending, slots = hashes[~found], slots[~found]
+        inserted = 0
+        while pending.size:
+            # Several new keys may land on the same empty slot; one wins per round
+            _, first = np.unique(slots, return_index=True)
+            table[slots[first]] = pending[first]
+            inserted += len(first)
+            pending = np.delete(pending, first)
+            slots, _ = cls._probe(table, pending)
+        return inserted
+
+    def _resize(self, capacity):
+        tmp_path = f'{self.path}.resize'
+        resized = np.memmap(tmp_path, dtype=np.uint64, mode='w+', shape=(capacity,))
+        for start in range(0, len(self.table), self.RESIZE_BLOCK):
+            block = np.asarray(self.table[start:start + self.RESIZE_BLOCK])
+            self._insert(resized, block[block != 0])
+        resized.flush()
+        del resized
+        del self.table
+        os.replace(tmp_path, self.path)
+        self.table = np.memmap(self.path, dtype=np.uint64, mode='r+')
+
+    def contains(self, values):
+        """Boolean array marking keys already in the index (nulls are never present)"""
+        result = np.zeros(len(values), dtype=bool)
+        notnull = values.notna().to_numpy()
+        if notnull.any():
+            _, found = self._probe(self.table, self.hash_keys(values[notnull]))
+            result[notnull] = found
+        return result
+
+    def add(self, values):
+        hashes = np.unique(self.hash_keys(values.dropna()))
+        needed = self.count + len(hashes)
+        if needed > len(self.table) * self.MAX_LOAD:
+            capacity = len(self.table)
+            while needed > capacity * self.MAX_LOAD:
+                capacity *= 2
+            self._resize(capacity)
+        self.count += self._insert(self.table, hashes)
+        self.flush()
+
+    def flush(self):
+        self.table.flush()
+        with open(self.meta_path, 'w') as f:
+            json.dump({'count': self.count, 'capacity': len(self.table)}, f)
+
+class KeyIndexStore:
+    """Per-table natural and referenced key indexes kept on disk across pipeline runs"""
+    def __init__(self, path=KEY_INDEX_PATH):
+        self.path = path
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, table_name, column=None):
+        column = column or NATURAL_KEYS[table_name]
+        if (table_name, column) not in self._indexes:
+            os.makedirs(self.path, exist_ok=True)
+            self._indexes[table_name, column] = KeyIndex(f'{self.path}/{table_name}_{column}.idx')
+        return self._indexes[table_name, column]
+
+    def seen(self, table_name, values):
+        """Boolean array marking keys that were already loaded in an earlier batch or run"""
+        with self._lock:
+            return self.get(table_name).contains(values)
+
+    def loaded(self, table_name, column, values):
+        """Boolean array marking values of `table_name.column` that were already loaded"""
+        with self._lock:
+            return self.get(table_name, column).contains(values)
+
+    def record(self, table_name, df):
+        """Add a loaded table's natural and referenced keys to their indexes"""
+        with self._lock:
+            for column in key_columns(table_name):
+                self.get(table_name, column).add(df[column])
+
+    def reset(self):
+        """Forget every recorded key, e.g. when the warehouse is rebuilt from scratch"""
+        with self._lock:
+            self._indexes = {}
+            shutil.rmtree(self.path, ignore_errors=True)
+
+# Initialize key index store
+key_indexes = KeyIndexStore()
@@ -1,51 +1,189 @@
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from config.database import db_manager
+from config.settings import LOAD_WORKERS, LOAD_CHUNK_ROWS
+from etl.key_index import key_indexes, key_columns
 import os
+import re
+import time
 from sqlalchemy import text
 
+SCHEMA_PATH = 'sql/create_tables.sql'
+
+# Analytics tables are upserted on their primary keys, so reloading them never duplicates rows
+UPSERT_KEYS = {
+    'customer_metrics': 'customer_id',
+    'product_metrics': 'product_id',
+    'monthly_summary': 'order_month',
+}
+
+def table_dependencies(schema_path=SCHEMA_PATH):
+    """Map each table created by a schema file to the tables its foreign keys reference"""
+    with open(schema_path) as f:
+        commands = db_manager.split_sql(f.read())
+    
+    dependencies = {}
+    for command in commands:
+        match = re.search(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', command, flags=re.IGNORECASE)
+        if match:
+            parents = set(re.findall(r'REFERENCES\s+(\w+)', command, flags=re.IGNORECASE))
+            dependencies[match.group(1)] = parents - {match.group(1)}
+    return dependencies
+
 class DataLoader:
-    def __init__(self):
+    def __init__(self, workers=LOAD_WORKERS, chunk_rows=LOAD_CHUNK_ROWS):
         self.db = db_manager
+        self.key_indexes = key_indexes
+        self.workers = workers if self.db.backend.concurrent_writes else 1
+        self.chunk_rows = chunk_rows
     
     def create_database_schema(self):
         """Create database tables"""
         try:
-            self.db.execute_sql_file('sql/create_tables.sql')
+            self.db.execute_sql_file(SCHEMA_PATH)
             print("Database schema created successfully!")
+            return True
         except Exception as e:
             print(f"Error creating schema: {e}")
+            return False
     
-    def load_table(self, df, table_name, if_exists='append'):
-        """Load DataFrame to database table"""
+    def load_table(self, df, table_name, if_exists='append', chunked=False):
+        """Load DataFrame to database table, optionally as row chunks over parallel connections"""
         try:
+            started = time.perf_counter()
+            
             # Handle date columns
             date_columns = df.select_dtypes(include=['datetime64']).columns
             for col in date_columns:
                 df[col] = df[col].dt.date
             
-            self.db.insert_dataframe(df, table_name, if_exists=if_exists)
-            print(f"Loaded {len(df)} records to {table_name}")
+            chunks = [df]
+            if chunked and if_exists == 'append' and self.workers > 1 and len(df) > self.chunk_rows:
+                chunks = [df.iloc[start:start + self.chunk_rows] for start in range(0, len(df), self.chunk_rows)]
+            
+            key = UPSERT_KEYS.get(table_name) if if_exists == 'append' else None
+            
+            def insert(chunk):
+                if key:
+                    self.db.upsert_dataframe(chunk, table_name, key)
+                else:
+                    self.db.insert_dataframe(chunk, table_name, if_exists=if_exists)
+            
+            if len(chunks) == 1:
+                insert(df)
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    futures = [pool.submit(insert, chunk) for chunk in chunks]
+                    for future in futures:
+                        future.result()
+            
+            elapsed = time.perf_counter() - started
+            print(f"Loaded {len(df)} records to {table_name} in {elapsed:.2f}s ({len(chunks)} chunk(s))")
+            
+            # Remember natural keys so later batches skip rows already in the warehouse
+            self.key_indexes.record(table_name, df)
+            return True
         except Exception as e:
             print(f"Error loading {table_name}: {e}")
+            return False
     
     def load_all_data(self, data_dict):
-        """Load all transformed data to database"""
+        """Load all transformed data to database, returning the tables that failed.
+
+        Foreign keys in the schema decide the order: a table starts once every
+        table it references has committed, and independent tables load
+        concurrently. Tables whose parents failed are skipped.
+        """
+        dependencies = table_dependencies()
+        pending = {
+            table_name: dependencies.get(table_name, set()) & set(data_dict)
+            for table_name in data_dict
+        }
+        loaded, failed_tables, futures = set(), [], {}
         
-        # Core tables first (due to foreign key constraints)
-        table_order = ['customers', 'products', 'orders', 'order_items']
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or futures:
+                for table_name, parents in list(pending.items()):
+                    if parents & set(failed_tables):
+                        print(f"Skipping {table_name}: parent table(s) {sorted(parents & set(failed_tables))} failed to load")
+                        failed_tables.append(table_name)
+                        del pending[table_name]
+                    elif parents <= loaded:
+                        # Only schema tables are chunked; others are created by their first insert
+                        chunked = table_name in dependencies
+                        futures[pool.submit(self.load_table, data_dict[table_name], table_name, chunked=chunked)] = table_name
+                        del pending[table_name]
+                
+                if not futures:
+                    # Only a foreign key cycle can leave tables pending with nothing running
+                    if pending:
+                        print(f"Cannot order tables with cyclic foreign keys: {sorted(pending)}")
+                        failed_tables.extend(pending)
+                    break
+                
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    table_name = futures.pop(future)
+                    if future.result():
+                        loaded.add(table_name)
+                    else:
+                        failed_tables.append(table_name)
         
-        for table_name in table_order:
+        return failed_tables
+    
+    def load_raw_data(self, data_dict):
+        """Bulk-load extracted data as-is into raw_* tables for in-database transformation"""
+        for table_name in ['customers', 'products', 'orders', 'order_items']:
             if table_name in data_dict:
-                self.load_table(data_dict[table_name], table_name)
+                # _row preserves file order, e.g. for "keep first" deduplication
+                df = data_dict[table_name]
+                df = df.assign(_row=range(len(df)))[['_row'] + list(df.columns)]
+                self.db.copy_dataframe(df, f'raw_{table_name}')
+                print(f"Loaded {len(df)} raw records to raw_{table_name}")
+    
+    def check_in_database_transform(self):
+        """Raise unless the backend can run sql/elt_transform.sql"""
+        if self.db.backend.name != 'postgres':
+            raise ValueError("In-database transformation requires the PostgreSQL backend")
+    
+    def transform_in_database(self):
+        """Clean raw_* tables and build analytics tables with set-based SQL"""
+        self.check_in_database_transform()
         
-        # Load analytics tables
-        analytics_tables = ['customer_metrics', 'product_metrics', 'monthly_summary']
-        for table_name in analytics_tables:
-            if table_name in data_dict:
-                self.load_table(data_dict[table_name], table_name)
+        self.db.execute_sql_file('sql/elt_transform.sql')
+        
+        row_counts = self.table_counts(['customers', 'products', 'orders', 'order_items',
+                                        'customer_metrics', 'product_metrics', 'monthly_summary'])
+        for table_name, count in row_counts.items():
+            print(f"Transformed {count} records into {table_name}")
+        return row_counts
+    
+    def table_counts(self, table_names):
+        """Current row count of each table, or None for a table that does not exist"""
+        row_counts = {}
+        for table_name in table_names:
+            # A separate connection per table: a missing table must not abort the next count
+            try:
+                with self.db.engine.connect() as conn:
+                    row_counts[table_name] = conn.execute(text(f'SELECT COUNT(*) FROM {table_name}')).scalar()
+            except Exception:
+                row_counts[table_name] = None
+        return row_counts
+    
+    def rebuild_key_index(self):
+        """Re-record the keys of every loaded table from the warehouse, e.g. after an in-database transform"""
+        self.key_indexes.reset()
+        for table_name in ['customers', 'products', 'orders', 'order_items']:
+            columns = ', '.join(key_columns(table_name))
+            self.key_indexes.record(table_name, self.db.execute_query(f'SELECT {columns} FROM {table_name}'))
     
     def update_sales_summary(self):
-        """Update daily sales summary table"""
+        """Rebuild the daily sales summary table from orders.
+
+        The old rows are deleted in the same transaction, so rerunning it (e.g.
+        from the hourly incremental update) replaces the summary instead of
+        appending another copy.
+        """
         summary_query = '''
         INSERT INTO sales_summary (summary_date, total_orders, total_revenue, total_customers, avg_order_value, top_category)
         SELECT 
@@ -67,10 +205,13 @@ class DataLoader:
         
         try:
             with self.db.engine.begin() as conn:
+                conn.execute(text('DELETE FROM sales_summary'))
                 conn.execute(text(summary_query))
             print("Sales summary updated successfully!")
+            return True
         except Exception as e:
             print(f"Error updating sales summary: {e}")
+            return False
 
 if __name__ == "__main__":
     # For testing
@@ -1,10 +1,22 @@
 from etl.extract import DataExtractor
 from etl.transform import DataTransformer
 from etl.load import DataLoader
-from datetime import datetime
-import schedule
-import time
+from etl.runner import JobRunner
+from etl.key_index import key_indexes
+from etl.cache import StageCache
+from config.settings import PIPELINE_MODE, INCREMENTAL_CHUNK_ROWS
+from datetime import datetime, timedelta
+import pandas as pd
+import config.database
+import etl.aggregate
+import etl.extract
+import etl.integrity
+import etl.load
+import etl.parallel
+import etl.transform
+import etl.validation
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(
@@ -20,64 +32,237 @@ class ETLPipeline:
     def __init__(self):
         self.extractor = DataExtractor()
         self.transformer = DataTransformer()
+        self.incremental_transformer = DataTransformer(incremental=True)
         self.loader = DataLoader()
+        self.cache = StageCache()
     
-    def run_full_pipeline(self):
-        """Run complete ETL pipeline"""
+    def run_full_pipeline(self, force=False):
+        """Run complete ETL pipeline, resuming from the last checkpointed stage.
+
+        Stage outputs are cached under hashes of the raw files and the code
+        that produces them. Unchanged stages are skipped; pass force=True to
+        rerun everything.
+        """
         try:
             logging.info("Starting ETL pipeline...")
+            cache = self.cache
+            raw_files = self.extractor.raw_file_paths()
+            
+            # Missing raw files are generated by the extractor before they can be hashed
+            raw_data = None
+            if not all(os.path.exists(path) for path in raw_files):
+                raw_data = self.extractor.extract_from_files()
+            
+            extract_key = cache.key(cache.hash_files(raw_files), cache.code_version(etl.extract))
+            transform_key = cache.key(extract_key, cache.code_version(
+                etl.transform, etl.validation, etl.integrity, etl.aggregate, etl.parallel
+            ))
+            load_key = cache.key(
+                transform_key,
+                cache.code_version(etl.load, config.database),
+                cache.hash_files(['sql/create_tables.sql']),
+                self.loader.db.backend.url()
+            )
+            
+            if not force and cache.has('load', load_key):
+                row_counts = cache.load('load', load_key)[1]['row_counts']
+                if self._warehouse_holds(row_counts):
+                    logging.info("Inputs unchanged since the last successful load; nothing to do")
+                    return row_counts
+                logging.warning("Warehouse no longer holds the last successful load; reloading it")
+            
+            clean_data = None if force else cache.load('transform', transform_key)[0]
+            if clean_data is not None:
+                logging.info("Steps 1-2: Reusing checkpointed transform output...")
+            else:
+                # Extract
+                logging.info("Step 1: Extracting data...")
+                if raw_data is None and not force:
+                    raw_data = cache.load('extract', extract_key)[0]
+                if raw_data is None:
+                    raw_data = self.extractor.extract_from_files()
+                if not cache.has('extract', extract_key):
+                    cache.save('extract', extract_key, raw_data)
+                
+                # Transform
+                logging.info("Step 2: Transforming data...")
+                clean_data = self.transformer.transform_all_data(raw_data)
+                cache.save('transform', transform_key, clean_data)
+            
+            # Load; the warehouse is no longer known to match any checkpoint until it succeeds
+            logging.info("Step 3: Loading data to database...")
+            self._reset_loaded_state()
+            schema_created = self.loader.create_database_schema()
+            failed_tables = self.loader.load_all_data(clean_data)
+            
+            # Update summary
+            logging.info("Step 4: Updating sales summary...")
+            summary_updated = self.loader.update_sales_summary()
+            
+            if not (schema_created and not failed_tables and summary_updated):
+                # No load checkpoint is saved, so the next run resumes from the transform checkpoint
+                raise RuntimeError(
+                    f"Load incomplete (schema created: {schema_created}, failed tables: {failed_tables}, "
+                    f"summary updated: {summary_updated})"
+                )
+            
+            row_counts = {table_name: len(df) for table_name, df in clean_data.items()}
+            cache.save('load', load_key, row_counts=row_counts)
+            logging.info("ETL pipeline completed successfully!")
+            return row_counts
+            
+        except Exception as e:
+            logging.error(f"Pipeline failed: {e}")
+            raise e
+    
+    def run_elt_pipeline(self):
+        """Run the pipeline with transformations pushed down into the database"""
+        try:
+            logging.info("Starting ELT pipeline...")
+            # Fail before the schema is dropped, not after
+            self.loader.check_in_database_transform()
             
             # Extract
             logging.info("Step 1: Extracting data...")
             raw_data = self.extractor.extract_from_files()
             
-            # Transform
-            logging.info("Step 2: Transforming data...")
-            clean_data = self.transformer.transform_all_data(raw_data)
-            
-            # Load
-            logging.info("Step 3: Loading data to database...")
+            # Load raw
+            logging.info("Step 2: Loading raw data to database...")
+            self._reset_loaded_state()
             self.loader.create_database_schema()
-            self.loader.load_all_data(clean_data)
+            self.loader.load_raw_data(raw_data)
+            
+            # Transform in database
+            logging.info("Step 3: Transforming data in database...")
+            row_counts = self.loader.transform_in_database()
+            # Rows were loaded by SQL, so index their keys for later incremental batches
+            self.loader.rebuild_key_index()
             
             # Update summary
             logging.info("Step 4: Updating sales summary...")
             self.loader.update_sales_summary()
             
-            logging.info("ETL pipeline completed successfully!")
+            logging.info("ELT pipeline completed successfully!")
+            return row_counts
             
         except Exception as e:
             logging.error(f"Pipeline failed: {e}")
             raise e
     
+    def run_pipeline(self):
+        """Run the full pipeline in the configured mode"""
+        if PIPELINE_MODE == 'elt':
+            return self.run_elt_pipeline()
+        return self.run_full_pipeline()
+    
+    def _reset_loaded_state(self):
+        """Forget load checkpoints, loaded keys and applied batches before the warehouse schema is recreated"""
+        self.cache.discard('load')
+        key_indexes.reset()
+        self.extractor.reset_applied_batches()
+    
+    def _warehouse_holds(self, row_counts):
+        """Whether every table still has at least the rows of a checkpointed load.
+
+        Incremental batches only add rows, so fewer rows (or a missing table)
+        means the warehouse was rebuilt or emptied since that load.
+        """
+        current = self.loader.table_counts(row_counts)
+        return all(current[table_name] is not None and current[table_name] >= count
+                   for table_name, count in row_counts.items())
+    
+    def _refresh_metrics(self):
+        """Recompute the analytics tables from warehouse rows streamed in chunks, and upsert them"""
+        db = self.loader.db
+        transformer = self.incremental_transformer
+        
+        def orders():
+            query = 'SELECT order_id, customer_id, order_date, total_amount, order_month FROM orders'
+            for chunk in db.iter_query(query, INCREMENTAL_CHUNK_ROWS):
+                chunk['order_date'] = pd.to_datetime(chunk['order_date'])
+                yield chunk
+        
+        order_items = db.iter_query('SELECT order_id, product_id, quantity, total_price FROM order_items', INCREMENTAL_CHUNK_ROWS)
+        metrics = {
+            'customer_metrics': transformer.customer_metrics(orders()),
+            'product_metrics': transformer.product_metrics(order_items),
+            'monthly_summary': transformer.monthly_summary(orders()),
+        }
+        return all(self.loader.load_table(df, table_name) for table_name, df in metrics.items())
+    
     def run_incremental_update(self):
-        """Run incremental data update (simplified)"""
+        """Apply new incremental batches chunk by chunk, then refresh metrics and the sales summary.
+
+        Each chunk is validated and resolved against the keys loaded by earlier
+        chunks, batches and runs, loaded, and its keys recorded before the next
+        chunk is read. Tables are applied parents first. A batch that fails
+        part-way is retried on the next run, where its loaded rows are skipped
+        as already loaded. Later batches wait for it, and the run raises so the
+        job history records the failure.
+        """
         try:
             logging.info("Running incremental update...")
-            self.loader.update_sales_summary()
+            transformer = self.incremental_transformer
+            row_counts = {}
+            failed_batch = None
+            
+            for batch in self.extractor.incremental_batches():
+                logging.info(f"Applying incremental batch {batch}...")
+                transformer.validator.reset()
+                applied = True
+                # RAW_FILES lists parent tables before their children
+                for table_name in [file.replace('.csv', '') for file in self.extractor.RAW_FILES]:
+                    for chunk in self.extractor.extract_batch_chunks(batch, table_name):
+                        clean = transformer.transform_chunk(table_name, chunk)
+                        if len(clean) and not self.loader.load_table(clean, table_name):
+                            applied = False
+                            break
+                        row_counts[table_name] = row_counts.get(table_name, 0) + len(clean)
+                    if not applied:
+                        break
+                
+                transformer.validator.save_quarantine(f'{transformer.validator.quarantine_path}/incremental/{batch}')
+                if not applied:
+                    failed_batch = batch
+                    break
+                self.extractor.mark_batch_applied(batch)
+            
+            # Rows from applied batches (and the loaded part of a failed one) are in the warehouse either way
+            metrics_refreshed = True
+            if row_counts:
+                logging.info("Refreshing business metrics...")
+                metrics_refreshed = self._refresh_metrics()
+            summary_updated = self.loader.update_sales_summary()
+            
+            if failed_batch is not None:
+                raise RuntimeError(f"Incremental batch {failed_batch} failed to load; it will be retried on the next run")
+            if not (metrics_refreshed and summary_updated):
+                raise RuntimeError(f"Incremental refresh incomplete (metrics: {metrics_refreshed}, summary: {summary_updated})")
             logging.info("Incremental update completed!")
+            return row_counts
         except Exception as e:
             logging.error(f"Incremental update failed: {e}")
+            raise e
     
-    def schedule_pipeline(self):
-        """Schedule pipeline runs"""
+    def schedule_pipeline(self, workers=2):
+        """Schedule pipeline runs on a non-overlapping job runner"""
+        runner = JobRunner(workers=workers)
+        
+        # Both jobs rebuild sales_summary, so they share a lock and never overlap
         # Full pipeline daily at 2 AM
-        schedule.every().day.at("02:00").do(self.run_full_pipeline)
+        runner.add_job('full_pipeline', self.run_pipeline, every=timedelta(days=1), at='02:00', lock='warehouse')
         
         # Incremental updates every hour
-        schedule.every().hour.do(self.run_incremental_update)
-        
-        logging.info("Pipeline scheduled. Running scheduler...")
+        runner.add_job('incremental_update', self.run_incremental_update, every=timedelta(hours=1), lock='warehouse')
         
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        logging.info("Pipeline scheduled. Running job runner...")
+        runner.start()
 
 if __name__ == "__main__":
     pipeline = ETLPipeline()
     
     # Run once immediately
-    pipeline.run_full_pipeline()
+    pipeline.run_pipeline()
     
     # Uncomment to run scheduler
     # pipeline.schedule_pipeline()
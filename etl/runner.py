@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from config.database import db_manager
+import pandas as pd
+import json
+import logging
+import queue
+import threading
+import time
+
+class Job:
+    """A recurring job whose run slots fall at `at` past midnight plus multiples of `every`"""
+    def __init__(self, name, func, every, at=None, lock=None):
+        self.name = name
+        self.func = func
+        self.every = every
+        self.offset = timedelta()
+        if at:
+            hour, minute = map(int, at.split(':'))
+            self.offset = timedelta(hours=hour, minutes=minute)
+        # Jobs sharing a lock name never run at the same time
+        self.lock = lock or name
+
+    def latest_slot(self, now):
+        """Most recent scheduled time at or before `now`"""
+        anchor = datetime.combine(now.date(), datetime.min.time()) + self.offset
+        return anchor + ((now - anchor) // self.every) * self.every
+
+class JobRunner:
+    """Run scheduled jobs from a queue on a worker pool, recording every run in pipeline_runs"""
+    def __init__(self, workers=2):
+        self.db = db_manager
+        self.jobs = {}
+        self.workers = workers
+        self._queue = queue.Queue()
+        self._locks = {}
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._next_slots = {}
+
+    def add_job(self, name, func, every, at=None, lock=None):
+        job = Job(name, func, every, at=at, lock=lock)
+        self.jobs[name] = job
+        self._locks.setdefault(job.lock, threading.Lock())
+        return job
+
+    def create_history_table(self):
+        self.db.execute_sql_file('sql/pipeline_runs.sql')
+
+    def last_scheduled(self):
+        """Latest recorded slot per job"""
+        query = 'SELECT job_name, MAX(scheduled_for) AS scheduled_for FROM pipeline_runs GROUP BY job_name'
+        history = self.db.execute_query(query)
+        history['scheduled_for'] = pd.to_datetime(history['scheduled_for'])
+        return {row.job_name: row.scheduled_for for row in history.itertuples()}
+
+    def submit(self, name, scheduled_for=None):
+        """Queue a job unless it is already queued or running"""
+        with self._active_lock:
+            if name in self._active:
+                logging.info(f"Job {name} is already queued or running; skipping")
+                return False
+            self._active.add(name)
+        self._queue.put((name, scheduled_for or datetime.now()))
+        return True
+
+    def _record_start(self, name, scheduled_for, started_at):
+        with self.db.engine.begin() as conn:
+            result = conn.execute(text('''
+                INSERT INTO pipeline_runs (job_name, scheduled_for, started_at, status)
+                VALUES (:job_name, :scheduled_for, :started_at, 'running')
+                RETURNING run_id
+            '''), {'job_name': name, 'scheduled_for': scheduled_for, 'started_at': started_at})
+            return result.scalar()
+
+    def _record_end(self, run_id, status, started, row_counts=None, error=None):
+        row_counts = row_counts or {}
+        with self.db.engine.begin() as conn:
+            conn.execute(text('''
+                UPDATE pipeline_runs
+                SET finished_at = :finished_at, status = :status, rows_processed = :rows_processed,
+                    row_counts = :row_counts, duration_seconds = :duration_seconds, error_message = :error_message
+                WHERE run_id = :run_id
+            '''), {
+                'run_id': run_id,
+                'finished_at': datetime.now(),
+                'status': status,
+                'rows_processed': sum(row_counts.values()),
+                'row_counts': json.dumps(row_counts),
+                'duration_seconds': round(time.monotonic() - started, 3),
+                'error_message': error
+            })
+
+    def _run(self, name, scheduled_for):
+        job = self.jobs[name]
+        with self._locks[job.lock]:
+            started = time.monotonic()
+            try:
+                run_id = self._record_start(name, scheduled_for, datetime.now())
+            except Exception as e:
+                logging.error(f"Could not record start of {name}: {e}")
+                run_id = None
+
+            try:
+                row_counts = job.func()
+                status, error = 'success', None
+            except Exception as e:
+                logging.error(f"Job {name} failed: {e}")
+                row_counts, status, error = None, 'failed', str(e)
+
+            if run_id is not None:
+                try:
+                    self._record_end(run_id, status, started, row_counts if isinstance(row_counts, dict) else None, error)
+                except Exception as e:
+                    logging.error(f"Could not record end of {name}: {e}")
+            logging.info(f"Job {name} finished with status {status} in {time.monotonic() - started:.1f}s")
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                name, scheduled_for = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self._run(name, scheduled_for)
+            finally:
+                with self._active_lock:
+                    self._active.discard(name)
+                self._queue.task_done()
+
+    def _catch_up(self, now):
+        """Queue one run for each job whose latest slot was missed while the runner was down"""
+        try:
+            last = self.last_scheduled()
+        except Exception as e:
+            logging.error(f"Could not read run history, skipping catch-up: {e}")
+            last = {}
+
+        for name, job in self.jobs.items():
+            slot = job.latest_slot(now)
+            if name in last and pd.notna(last[name]) and last[name] < slot:
+                logging.info(f"Catching up missed run of {name} scheduled for {slot}")
+                self.submit(name, slot)
+            self._next_slots[name] = slot + job.every
+
+    def start(self):
+        """Start the worker pool and scheduling loop; blocks until stop() is called"""
+        self.create_history_table()
+        self._catch_up(datetime.now())
+
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True).start()
+
+        logging.info("Job runner started")
+        while not self._stop.is_set():
+            now = datetime.now()
+            for name, job in self.jobs.items():
+                if self._next_slots[name] <= now:
+                    self.submit(name, self._next_slots[name])
+                    self._next_slots[name] = job.latest_slot(now) + job.every
+            wait = min(self._next_slots.values()) - datetime.now()
+            self._stop.wait(max(wait.total_seconds(), 0.1))
+
+    def stop(self):
+        self._stop.set()
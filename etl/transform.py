@@ -2,19 +2,74 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+from etl.validation import DataValidator
+from etl.integrity import IntegrityResolver
+from etl.key_index import key_indexes
+from etl.aggregate import SpillAggregator
+from etl.parallel import ShardedExecutor, pack_rows, unpack_rows
+from config.settings import PARALLEL_WORKERS, PARALLEL_MIN_ROWS
+
+_worker_transformer = None
+
+def _clean_shard(df, method_name):
+    """Clean one shard inside a worker process, returning its packed rows and its rejects"""
+    global _worker_transformer
+    if _worker_transformer is None:
+        _worker_transformer = DataTransformer(workers=1)
+    validator = _worker_transformer.validator
+    clean = getattr(_worker_transformer, method_name)(df)
+    result = (pack_rows(clean), validator.rejected, validator.rule_counts)
+    validator.reset()
+    return result
+
+def _aggregate_shard(df, by, spec):
+    return df.groupby(by).agg(spec)
 
 class DataTransformer:
-    def __init__(self):
+    def __init__(self, workers=PARALLEL_WORKERS, incremental=False):
+        """With `incremental`, rows are checked against keys already in the warehouse.
+
+        A full transform rebuilds the warehouse from scratch, so it ignores the
+        key index; incremental batches reject rows that were already loaded and
+        resolve foreign keys against earlier loads.
+        """
         self.processed_path = 'data/processed'
         os.makedirs(self.processed_path, exist_ok=True)
+        index = key_indexes if incremental else None
+        self.validator = DataValidator(key_indexes=index)
+        self.integrity = IntegrityResolver(self.validator, key_indexes=index)
+        self.aggregator = SpillAggregator()
+        # Incremental chunks are small and must see keys recorded by the chunks before them
+        self.executor = ShardedExecutor(workers) if workers > 1 and not incremental else None
+    
+    def _use_shards(self, df):
+        return self.executor is not None and len(df) >= PARALLEL_MIN_ROWS
+    
+    def _concat_shards(self, frames):
+        non_empty = [frame for frame in frames if len(frame)]
+        return pd.concat(non_empty or frames[:1]).sort_index()
+    
+    def _clean_sharded(self, df, method_name, key):
+        """Run a clean_* method over key-hashed shards in parallel and restore the original row order"""
+        results = self.executor.map_shards(df, key, _clean_shard, method_name)
+        for _, rejected, rule_counts in results:
+            self.validator.merge(rejected, rule_counts)
+        return unpack_rows([result[0] for result in results], df.index)
+    
+    def _aggregate(self, df, by, spec):
+        """groupby(by).agg(spec) over a DataFrame, sharded across processes when large, or over
+        an iterable of chunks, spilled to disk beyond the aggregator's memory budget"""
+        if isinstance(df, pd.DataFrame) and self._use_shards(df):
+            columns = [by] + [column for column in spec if column != by]
+            return self._concat_shards(self.executor.map_shards(df[columns], by, _aggregate_shard, by, spec))
+        return self.aggregator.aggregate(df, by, spec)
     
     def clean_customers(self, df):
         """Clean and validate customer data"""
-        # Remove duplicates
-        df = df.drop_duplicates(subset=['email'])
-        
-        # Validate email format (basic)
-        df = df[df['email'].str.contains('@', na=False)]
+        # Validate duplicates, email format (basic) and dates in a single pass
+        df = self.validator.validate(df, 'customers', converted={
+            'registration_date': pd.to_datetime(df['registration_date'], errors='coerce')
+        })
         
         # Standardize country names
         country_mapping = {
@@ -25,17 +80,12 @@ class DataTransformer:
         }
         df['country'] = df['country'].replace(country_mapping)
         
-        # Validate dates
-        df['registration_date'] = pd.to_datetime(df['registration_date'], errors='coerce')
-        df = df.dropna(subset=['registration_date'])
-        
         return df
     
     def clean_products(self, df):
         """Clean and validate product data"""
         # Remove products with invalid prices
-        df = df[df['unit_price'] > 0]
-        df = df[df['cost_price'] > 0]
+        df = self.validator.validate(df, 'products')
         
         # Calculate profit margin
         df['profit_margin'] = ((df['unit_price'] - df['cost_price']) / df['unit_price'] * 100).round(2)
@@ -51,18 +101,18 @@ class DataTransformer:
     
     def clean_orders(self, df):
         """Clean and validate order data"""
-        # Convert date columns
-        df['order_date'] = pd.to_datetime(df['order_date'], errors='coerce')
-        df['ship_date'] = pd.to_datetime(df['ship_date'], errors='coerce')
+        if self._use_shards(df):
+            return self._clean_sharded(df, 'clean_orders', 'customer_id')
         
-        # Remove orders with invalid dates
-        df = df.dropna(subset=['order_date'])
+        # Remove orders with invalid dates or amounts
+        df = self.validator.validate(df, 'orders', converted={
+            'order_date': pd.to_datetime(df['order_date'], errors='coerce'),
+            'ship_date': pd.to_datetime(df['ship_date'], errors='coerce')
+        })
         
         # Calculate shipping days
         df['shipping_days'] = (df['ship_date'] - df['order_date']).dt.days
         
-        # Validate amounts
-        df = df[df['total_amount'] > 0]
         df['discount_amount'] = df['discount_amount'].fillna(0)
         
         # Add derived fields
@@ -74,9 +124,11 @@ class DataTransformer:
     
     def clean_order_items(self, df):
         """Clean and validate order items data"""
-        # Validate quantities and prices
-        df = df[df['quantity'] > 0]
-        df = df[df['unit_price'] > 0]
+        if self._use_shards(df):
+            return self._clean_sharded(df, 'clean_order_items', 'product_id')
+        
+        # Validate quantities, prices and discounts
+        df = self.validator.validate(df, 'order_items')
         
         # Recalculate total price to ensure consistency
         df['total_price'] = df['quantity'] * df['unit_price']
@@ -87,18 +139,14 @@ class DataTransformer:
         
         return df
     
-    def create_business_metrics(self, orders_df, order_items_df, customers_df, products_df):
-        """Create business intelligence metrics"""
-        
-        # Ensure data is consistent
-        # Get all valid order IDs from the (already filtered) orders_df
-        valid_order_ids = orders_df['order_id'].unique()
-
-        # Filter order_items_df to only include items for those valid orders
-        order_items_df_cleaned = order_items_df[order_items_df['order_id'].isin(valid_order_ids)].copy()
-
-        # Customer metrics
-        customer_metrics = orders_df.groupby('customer_id').agg({
+    def transform_chunk(self, table_name, df):
+        """Clean one chunk of an incremental batch and drop rows whose parents were never loaded"""
+        clean = getattr(self, f'clean_{table_name}')(df)
+        return self.integrity.resolve({table_name: clean})[table_name]
+    
+    def customer_metrics(self, orders):
+        """Per-customer order metrics from an orders DataFrame or an iterable of its chunks"""
+        customer_metrics = self._aggregate(orders, 'customer_id', {
             'order_id': 'count',
             'total_amount': ['sum', 'mean', 'max'],
             'order_date': ['min', 'max']
@@ -106,20 +154,22 @@ class DataTransformer:
         
         customer_metrics.columns = ['order_count', 'total_spent', 'avg_order_value', 'max_order_value', 'first_order', 'last_order']
         customer_metrics['customer_lifetime_days'] = (customer_metrics['last_order'] - customer_metrics['first_order']).dt.days
-        customer_metrics = customer_metrics.reset_index()
-        
-        # Product performance
-        product_metrics = order_items_df_cleaned.groupby('product_id').agg({
+        return customer_metrics.reset_index()
+    
+    def product_metrics(self, order_items):
+        """Per-product sales from an order items DataFrame or an iterable of its chunks"""
+        product_metrics = self._aggregate(order_items, 'product_id', {
             'quantity': 'sum',
             'total_price': 'sum',
             'order_id': 'nunique'
         }).round(2)
         
         product_metrics.columns = ['total_quantity_sold', 'total_revenue', 'unique_orders']
-        product_metrics = product_metrics.reset_index()
-
-        # Monthly sales summary
-        monthly_summary = orders_df.groupby('order_month').agg({
+        return product_metrics.reset_index()
+    
+    def monthly_summary(self, orders):
+        """Monthly sales summary from an orders DataFrame or an iterable of its chunks"""
+        monthly_summary = self._aggregate(orders, 'order_month', {
             'order_id': 'count',
             'total_amount': 'sum',
             'customer_id': 'nunique'
@@ -127,13 +177,29 @@ class DataTransformer:
         
         monthly_summary.columns = ['total_orders', 'total_revenue', 'total_customers']
         monthly_summary['avg_order_value'] = (monthly_summary['total_revenue'] / monthly_summary['total_orders']).round(2)
-        monthly_summary = monthly_summary.reset_index()
+        return monthly_summary.reset_index()
+    
+    def create_business_metrics(self, orders_df, order_items_df, customers_df, products_df):
+        """Create business intelligence metrics"""
+        
+        # Ensure data is consistent
+        # Get all valid order IDs from the (already filtered) orders_df
+        valid_order_ids = orders_df['order_id'].unique()
+
+        # Filter order_items_df to only include items for those valid orders
+        order_items_df_cleaned = order_items_df[order_items_df['order_id'].isin(valid_order_ids)].copy()
+
+        customer_metrics = self.customer_metrics(orders_df)
+        product_metrics = self.product_metrics(order_items_df_cleaned)
+        monthly_summary = self.monthly_summary(orders_df)
         
         # Add order_items_df_cleaned to your return statement
         return customer_metrics, product_metrics, monthly_summary, order_items_df_cleaned
     
     def transform_all_data(self, data_dict):
         """Transform all extracted data"""
+        # The transformer outlives a single run when scheduled, so start from an empty quarantine
+        self.validator.reset()
         transformed_data = {}
         
         # Transform each table
@@ -142,6 +208,9 @@ class DataTransformer:
         transformed_data['orders'] = self.clean_orders(data_dict['orders'])
         transformed_data['order_items'] = self.clean_order_items(data_dict['order_items'])
         
+        # Quarantine rows referencing customers, orders or products that did not survive cleaning
+        self.integrity.resolve(transformed_data)
+        
         # Create business metrics
         customer_metrics, product_metrics, monthly_summary, order_items_df_cleaned = self.create_business_metrics(
             transformed_data['orders'],
@@ -160,6 +229,9 @@ class DataTransformer:
             df.to_csv(f'{self.processed_path}/{table_name}.csv', index=False)
             print(f"Saved {len(df)} records to {table_name}.csv")
         
+        # Save rejected rows and per-rule counts
+        self.validator.save_quarantine()
+        
         return transformed_data
 
 if __name__ == "__main__":
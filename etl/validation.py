@@ -0,0 +1,152 @@
+import pandas as pd
+import numpy as np
+import os
+from etl.key_index import NATURAL_KEYS
+
+class Rule:
+    """A single row-level check; `failed` returns a boolean array marking bad rows"""
+    def __init__(self, code, column, kind, **params):
+        self.code = code
+        self.column = column
+        self.kind = kind
+        self.params = params
+
+    def failed(self, values):
+        if self.kind == 'positive':
+            # NaN compares False, so missing values fail too
+            return ~(values > 0).to_numpy()
+        if self.kind == 'not_null':
+            return values.isna().to_numpy()
+        if self.kind == 'format':
+            return ~values.astype('string').str.contains(self.params['pattern'], regex=True, na=False).to_numpy(dtype=bool)
+        if self.kind == 'range':
+            in_range = values.between(self.params.get('min', -np.inf), self.params.get('max', np.inf))
+            if self.params.get('allow_null', True):
+                in_range |= values.isna()
+            return ~in_range.to_numpy()
+        if self.kind == 'unique':
+            return values.duplicated(keep='first').to_numpy()
+        raise ValueError(f"Unknown rule kind: {self.kind}")
+
+# Declarative rule sets per table
+VALIDATION_RULES = {
+    'customers': [
+        Rule('CUST_EMAIL_DUPLICATE', 'email', 'unique'),
+        Rule('CUST_EMAIL_FORMAT', 'email', 'format', pattern='@'),
+        Rule('CUST_REGISTRATION_DATE_NULL', 'registration_date', 'not_null'),
+    ],
+    'products': [
+        Rule('PROD_UNIT_PRICE_POSITIVE', 'unit_price', 'positive'),
+        Rule('PROD_COST_PRICE_POSITIVE', 'cost_price', 'positive'),
+    ],
+    'orders': [
+        Rule('ORD_ORDER_DATE_NULL', 'order_date', 'not_null'),
+        Rule('ORD_TOTAL_AMOUNT_POSITIVE', 'total_amount', 'positive'),
+    ],
+    'order_items': [
+        Rule('ITEM_QUANTITY_POSITIVE', 'quantity', 'positive'),
+        Rule('ITEM_UNIT_PRICE_POSITIVE', 'unit_price', 'positive'),
+        Rule('ITEM_DISCOUNT_RANGE', 'discount_percentage', 'range', min=0, max=100),
+    ],
+}
+
+def describe_failures(failures, codes):
+    """Map each failure bitmask to a ';'-joined list of the rule codes it sets"""
+    masks, inverse = np.unique(failures, return_inverse=True)
+    labels = np.array([
+        ';'.join(code for bit, code in enumerate(codes) if int(mask) >> bit & 1)
+        for mask in masks
+    ], dtype=object)
+    return labels[inverse]
+
+class DataValidator:
+    def __init__(self, rules=None, quarantine_path='data/quarantine', key_indexes=None):
+        self.rules = rules or VALIDATION_RULES
+        self.key_indexes = key_indexes
+        self.quarantine_path = quarantine_path
+        self.rejected = {}
+        self.rule_counts = {}
+
+    def reset(self):
+        """Forget rejects and counts from a previous run"""
+        self.rejected = {}
+        self.rule_counts = {}
+
+    def validate(self, df, table_name, converted=None):
+        """Apply a table's rules in one pass and return only the passing rows.
+
+        All rules are evaluated into a single bitmask, so the input is copied
+        exactly once. `converted` maps column names to already-parsed values
+        (e.g. coerced dates) that are checked and written into the result in
+        place of the raw columns. When `key_indexes` is set, rows whose natural
+        key was loaded by an earlier chunk, batch or run fail as well. Rejected rows
+        are kept with their failing rule codes for `save_quarantine`.
+        """
+        converted = converted or {}
+        rules = self.rules.get(table_name, [])
+        codes = [rule.code for rule in rules]
+
+        failures = np.zeros(len(df), dtype=np.uint64)
+        for bit, rule in enumerate(rules):
+            values = converted[rule.column] if rule.column in converted else df[rule.column]
+            failures |= rule.failed(values).astype(np.uint64) << np.uint64(bit)
+
+        if self.key_indexes is not None and table_name in NATURAL_KEYS:
+            column = NATURAL_KEYS[table_name]
+            seen = self.key_indexes.seen(table_name, df[column])
+            if not any(rule.kind == 'unique' and rule.column == column for rule in rules):
+                # A repeat within the chunk counts as loaded by its first occurrence
+                seen |= df[column].duplicated().to_numpy()
+            failures |= seen.astype(np.uint64) << np.uint64(len(codes))
+            codes.append(f'{table_name.upper()}_{column.upper()}_ALREADY_LOADED')
+
+        passed = failures == 0
+        keep = np.flatnonzero(passed)
+        clean = df.take(keep)
+        for column, values in converted.items():
+            clean[column] = np.asarray(values)[keep]
+
+        self.count(table_name, failures, codes)
+        if not passed.all():
+            self.reject(df.take(np.flatnonzero(~passed)), table_name, describe_failures(failures[~passed], codes))
+
+        return clean
+
+    def count(self, table_name, failures, codes):
+        """Accumulate per-rule rejection counts from a failure bitmask"""
+        counts = self.rule_counts.setdefault(table_name, {})
+        for bit, code in enumerate(codes):
+            count = int(((failures >> np.uint64(bit)) & np.uint64(1)).sum())
+            counts[code] = counts.get(code, 0) + count
+
+    def reject(self, rows, table_name, failed_rules):
+        """Record rows to quarantine with the rule codes they failed"""
+        rows = rows.assign(failed_rules=failed_rules)
+        if table_name in self.rejected:
+            rows = pd.concat([self.rejected[table_name], rows])
+        self.rejected[table_name] = rows
+
+    def merge(self, rejected, rule_counts):
+        """Fold in rejects and counts collected by another validator (e.g. in a worker process)"""
+        for table_name, rows in rejected.items():
+            self.reject(rows.drop(columns='failed_rules'), table_name, rows['failed_rules'].to_numpy())
+        for table_name, counts in rule_counts.items():
+            merged = self.rule_counts.setdefault(table_name, {})
+            for code, count in counts.items():
+                merged[code] = merged.get(code, 0) + count
+
+    def save_quarantine(self, path=None):
+        """Write rejected rows and per-rule counts to `path` (default: the quarantine directory)"""
+        path = path or self.quarantine_path
+        os.makedirs(path, exist_ok=True)
+        for table_name, rows in self.rejected.items():
+            rows.to_csv(f'{path}/{table_name}_rejected.csv', index=False)
+            print(f"Quarantined {len(rows)} records from {table_name}")
+
+        summary = pd.DataFrame([
+            {'table_name': table_name, 'rule_code': code, 'rejected_count': count}
+            for table_name, counts in self.rule_counts.items()
+            for code, count in counts.items()
+        ], columns=['table_name', 'rule_code', 'rejected_count'])
+        summary.to_csv(f'{path}/validation_summary.csv', index=False)
+        return summary
@@ -4,6 +4,9 @@ DROP TABLE IF EXISTS orders CASCADE;
 DROP TABLE IF EXISTS products CASCADE;
 DROP TABLE IF EXISTS customers CASCADE;
 DROP TABLE IF EXISTS sales_summary CASCADE;
+DROP TABLE IF EXISTS customer_metrics CASCADE;
+DROP TABLE IF EXISTS product_metrics CASCADE;
+DROP TABLE IF EXISTS monthly_summary CASCADE;
 
 -- Create customers table
 CREATE TABLE customers (
@@ -70,6 +73,33 @@ CREATE TABLE sales_summary (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create analytics tables (loaded with upserts on their keys)
+CREATE TABLE customer_metrics (
+    customer_id INTEGER PRIMARY KEY,
+    order_count INTEGER NOT NULL,
+    total_spent DECIMAL(15, 2),
+    avg_order_value DECIMAL(12, 2),
+    max_order_value DECIMAL(12, 2),
+    first_order DATE,
+    last_order DATE,
+    customer_lifetime_days INTEGER
+);
+
+CREATE TABLE product_metrics (
+    product_id INTEGER PRIMARY KEY,
+    total_quantity_sold INTEGER,
+    total_revenue DECIMAL(15, 2),
+    unique_orders INTEGER
+);
+
+CREATE TABLE monthly_summary (
+    order_month VARCHAR(7) PRIMARY KEY,
+    total_orders INTEGER,
+    total_revenue DECIMAL(15, 2),
+    total_customers INTEGER,
+    avg_order_value DECIMAL(10, 2)
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_orders_date ON orders(order_date);
 CREATE INDEX idx_orders_customer ON orders(customer_id);
@@ -77,3 +107,5 @@ CREATE INDEX idx_order_items_order ON order_items(order_id);
 CREATE INDEX idx_order_items_product ON order_items(product_id);
 CREATE INDEX idx_customers_segment ON customers(customer_segment);
 CREATE INDEX idx_products_category ON products(category);
+CREATE INDEX idx_customer_metrics_last_order ON customer_metrics(last_order DESC);
+CREATE INDEX idx_product_metrics_revenue ON product_metrics(total_revenue DESC);
@@ -0,0 +1,195 @@
+-- In-database ELT: clean raw_* tables and build analytics tables with set-based SQL.
+-- Mirrors DataTransformer (validation rules, integrity stage and business metrics).
+
+-- Lenient timestamp parsing, equivalent to pd.to_datetime(errors='coerce') for the ISO
+-- dates (with an optional time of day) in the extracts. Out-of-range values yield NULL through
+-- range checks rather than an exception handler, and make_timestamp does not depend on
+-- DateStyle, so the function is immutable and parallel safe.
+CREATE OR REPLACE FUNCTION try_to_timestamp(value TEXT) RETURNS TIMESTAMP AS $$
+    SELECT CASE
+        WHEN p IS NULL OR p[1]::INT < 1 OR p[2]::INT NOT BETWEEN 1 AND 12 THEN NULL
+        WHEN p[3]::INT NOT BETWEEN 1 AND EXTRACT(DAY FROM make_date(p[1]::INT, p[2]::INT, 1) + INTERVAL '1 month - 1 day') THEN NULL
+        WHEN COALESCE(p[4], '0')::INT > 23 OR COALESCE(p[5], '0')::INT > 59 OR COALESCE(p[6], '0')::NUMERIC >= 60 THEN NULL
+        ELSE make_timestamp(p[1]::INT, p[2]::INT, p[3]::INT, COALESCE(p[4], '0')::INT, COALESCE(p[5], '0')::INT,
+                            COALESCE(p[6], '0')::DOUBLE PRECISION)
+    END
+    FROM regexp_match(btrim(value), '^(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T](\d{2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?)?$') AS p
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+DROP TABLE IF EXISTS stg_order_items;
+DROP TABLE IF EXISTS stg_orders;
+DROP TABLE IF EXISTS stg_products;
+DROP TABLE IF EXISTS stg_customers;
+
+-- Customers: first row per email, basic email format, valid registration date
+CREATE TABLE stg_customers AS
+SELECT
+    customer_id,
+    customer_name,
+    email,
+    registration_ts::DATE AS registration_date,
+    CASE country
+        WHEN 'US' THEN 'USA'
+        WHEN 'United States' THEN 'USA'
+        WHEN 'UK' THEN 'United Kingdom'
+        WHEN 'Deutschland' THEN 'Germany'
+        ELSE country
+    END AS country,
+    city,
+    customer_segment
+FROM (
+    SELECT
+        r.*,
+        try_to_timestamp(r.registration_date::TEXT) AS registration_ts,
+        ROW_NUMBER() OVER (PARTITION BY r.email ORDER BY r._row) AS email_rank
+    FROM raw_customers r
+) c
+WHERE email_rank = 1
+  AND POSITION('@' IN email) > 0
+  AND registration_ts IS NOT NULL;
+
+-- Products: positive prices, profit margin, title-cased categories
+CREATE TABLE stg_products AS
+SELECT
+    product_id,
+    product_name,
+    INITCAP(category) AS category,
+    INITCAP(subcategory) AS subcategory,
+    unit_price,
+    cost_price,
+    brand,
+    try_to_timestamp(created_date::TEXT)::DATE AS created_date,
+    ROUND(((unit_price - cost_price) / unit_price * 100)::NUMERIC, 2) AS profit_margin
+FROM raw_products
+WHERE unit_price > 0
+  AND cost_price > 0;
+
+-- Orders: valid order date, positive amount, customer survived cleaning
+CREATE TABLE stg_orders AS
+SELECT
+    o.order_id,
+    o.customer_id,
+    o.order_ts,
+    o.ship_ts,
+    o.ship_mode,
+    o.order_status,
+    COALESCE(o.discount_amount, 0) AS discount_amount,
+    o.total_amount,
+    DATE_PART('day', o.ship_ts - o.order_ts)::INTEGER AS shipping_days,
+    TO_CHAR(o.order_ts, 'YYYY-MM') AS order_month,
+    EXTRACT(YEAR FROM o.order_ts)::INTEGER AS order_year,
+    TO_CHAR(o.order_ts, 'FMDay') AS day_of_week
+FROM (
+    SELECT
+        r.*,
+        try_to_timestamp(r.order_date::TEXT) AS order_ts,
+        try_to_timestamp(r.ship_date::TEXT) AS ship_ts
+    FROM raw_orders r
+) o
+WHERE o.order_ts IS NOT NULL
+  AND o.total_amount > 0
+  AND (o.customer_id IS NULL OR EXISTS (SELECT 1 FROM stg_customers c WHERE c.customer_id = o.customer_id));
+
+-- Order items: positive quantity and price, discount within 0-100, parents survived cleaning
+CREATE TABLE stg_order_items AS
+SELECT
+    i.item_id,
+    i.order_id,
+    i.product_id,
+    i.quantity,
+    i.unit_price,
+    i.quantity * i.unit_price AS total_price,
+    i.discount_percentage,
+    i.quantity * i.unit_price * i.discount_percentage / 100 AS discount_amount,
+    i.quantity * i.unit_price - i.quantity * i.unit_price * i.discount_percentage / 100 AS final_price
+FROM raw_order_items i
+WHERE i.quantity > 0
+  AND i.unit_price > 0
+  AND (i.discount_percentage IS NULL OR i.discount_percentage BETWEEN 0 AND 100)
+  AND (i.order_id IS NULL OR EXISTS (SELECT 1 FROM stg_orders o WHERE o.order_id = i.order_id))
+  AND (i.product_id IS NULL OR EXISTS (SELECT 1 FROM stg_products p WHERE p.product_id = i.product_id));
+
+-- Load core tables
+INSERT INTO customers (customer_id, customer_name, email, registration_date, country, city, customer_segment)
+SELECT customer_id, customer_name, email, registration_date, country, city, customer_segment
+FROM stg_customers;
+
+INSERT INTO products (product_id, product_name, category, subcategory, unit_price, cost_price, brand, created_date, profit_margin)
+SELECT product_id, product_name, category, subcategory, unit_price, cost_price, brand, created_date, profit_margin
+FROM stg_products;
+
+INSERT INTO orders (order_id, customer_id, order_date, ship_date, ship_mode, order_status, total_amount, discount_amount,
+                    shipping_days, order_month, order_year, day_of_week)
+SELECT order_id, customer_id, order_ts::DATE, ship_ts::DATE, ship_mode, order_status, total_amount, discount_amount,
+       shipping_days, order_month, order_year, day_of_week
+FROM stg_orders;
+
+INSERT INTO order_items (item_id, order_id, product_id, quantity, unit_price, total_price, discount_percentage,
+                         discount_amount, final_price)
+SELECT item_id, order_id, product_id, quantity, unit_price, total_price, discount_percentage, discount_amount, final_price
+FROM stg_order_items;
+
+-- Business metrics, upserted into the keyed analytics tables from create_tables.sql
+INSERT INTO customer_metrics (customer_id, order_count, total_spent, avg_order_value, max_order_value,
+                              first_order, last_order, customer_lifetime_days)
+SELECT
+    customer_id,
+    COUNT(order_id) AS order_count,
+    ROUND(SUM(total_amount)::NUMERIC, 2) AS total_spent,
+    ROUND(AVG(total_amount)::NUMERIC, 2) AS avg_order_value,
+    ROUND(MAX(total_amount)::NUMERIC, 2) AS max_order_value,
+    MIN(order_ts)::DATE AS first_order,
+    MAX(order_ts)::DATE AS last_order,
+    DATE_PART('day', MAX(order_ts) - MIN(order_ts))::INTEGER AS customer_lifetime_days
+FROM stg_orders
+WHERE customer_id IS NOT NULL
+GROUP BY customer_id
+ON CONFLICT (customer_id) DO UPDATE SET
+    order_count = EXCLUDED.order_count,
+    total_spent = EXCLUDED.total_spent,
+    avg_order_value = EXCLUDED.avg_order_value,
+    max_order_value = EXCLUDED.max_order_value,
+    first_order = EXCLUDED.first_order,
+    last_order = EXCLUDED.last_order,
+    customer_lifetime_days = EXCLUDED.customer_lifetime_days;
+
+INSERT INTO product_metrics (product_id, total_quantity_sold, total_revenue, unique_orders)
+SELECT
+    product_id,
+    SUM(quantity) AS total_quantity_sold,
+    ROUND(SUM(total_price)::NUMERIC, 2) AS total_revenue,
+    COUNT(DISTINCT order_id) AS unique_orders
+FROM stg_order_items
+WHERE product_id IS NOT NULL
+GROUP BY product_id
+ON CONFLICT (product_id) DO UPDATE SET
+    total_quantity_sold = EXCLUDED.total_quantity_sold,
+    total_revenue = EXCLUDED.total_revenue,
+    unique_orders = EXCLUDED.unique_orders;
+
+INSERT INTO monthly_summary (order_month, total_orders, total_revenue, total_customers, avg_order_value)
+SELECT
+    order_month,
+    total_orders,
+    total_revenue,
+    total_customers,
+    ROUND(total_revenue / total_orders, 2) AS avg_order_value
+FROM (
+    SELECT
+        order_month,
+        COUNT(order_id) AS total_orders,
+        ROUND(SUM(total_amount)::NUMERIC, 2) AS total_revenue,
+        COUNT(DISTINCT customer_id) AS total_customers
+    FROM stg_orders
+    GROUP BY order_month
+) m
+ON CONFLICT (order_month) DO UPDATE SET
+    total_orders = EXCLUDED.total_orders,
+    total_revenue = EXCLUDED.total_revenue,
+    total_customers = EXCLUDED.total_customers,
+    avg_order_value = EXCLUDED.avg_order_value;
+
+DROP TABLE stg_order_items;
+DROP TABLE stg_orders;
+DROP TABLE stg_products;
+DROP TABLE stg_customers;
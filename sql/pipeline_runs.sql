@@ -0,0 +1,15 @@
+-- Pipeline run history (kept across full reloads, never dropped)
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    run_id SERIAL PRIMARY KEY,
+    job_name VARCHAR(50) NOT NULL,
+    scheduled_for TIMESTAMP NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    rows_processed INTEGER,
+    row_counts TEXT,
+    duration_seconds DECIMAL(12, 3),
+    error_message TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_job ON pipeline_runs(job_name, scheduled_for);